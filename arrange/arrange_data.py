@@ -1,81 +1,135 @@
+from collections import OrderedDict
 from typing import Optional
+import threading
 import time
+import traceback
 from PySide6.QtCore import QDir
-import yaml
-import os
 
+from .rule_store import RuleListItem, open_rule_store
 
-class RuleListItem(object):
-    yaml_tag = "!rule_list_item"
+# pending write deleting the rule content
+_Delete = object()
 
-    def __init__(self) -> None:
-        self.id: int = time.time_ns() // 1000_000
-        self.name: str = ""
+# key of the pending write of the rule list, rule contents use their id
+_Rule_List_Key = "rule_list"
 
-    @staticmethod
-    def _constructor(loader, node):
-        data = loader.construct_mapping(node)
-        item = RuleListItem()
-        item.id = int(data["id"])
-        item.name = data["name"]
-        return item
 
-    @staticmethod
-    def _representer(dumper, item: "RuleListItem"):
-        data = {"id": item.id, "name": item.name}
-        return dumper.represent_mapping(RuleListItem.yaml_tag, data)
+def _copy_items(rule_list: list[RuleListItem]) -> list[RuleListItem]:
+    """
+    Copies of the items of a rule list, the models rename their items in
+    place while the writer thread may be saving them.
+    """
+    items = []
+    for rule in rule_list:
+        item = RuleListItem()
+        item.id = rule.id
+        item.name = rule.name
+        items.append(item)
+    return items
 
 
-yaml.add_representer(RuleListItem, RuleListItem._representer, yaml.SafeDumper)
-yaml.add_constructor(RuleListItem.yaml_tag, RuleListItem._constructor, yaml.SafeLoader)
+class RuleDataHandler(object):
+    """
+    Rule list and rule contents of the data folder, kept in the store
+    `rule_store.open_rule_store` picks for it.
 
+    Writes are write-behind, changes of a rule coalesce into its last one
+    and are written by a worker thread once nothing changed for
+    `_flush_delay` seconds. Reads see the pending changes, `flush` writes
+    them at once. The parsed contents of the last used rules are cached.
+    """
 
-class RuleDataHandler(object):
     _instance: Optional["RuleDataHandler"] = None
 
+    _flush_delay = 0.5
+    _content_cache_size = 64
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
     def __init__(self) -> None:
+        # the instance is shared, pending writes must survive `__init__`
+        if getattr(self, "_cfg_dir", None) is not None:
+            return
+
         self._cfg_dir = QDir("data:")
         if not self._cfg_dir.exists("./arrange"):
             self._cfg_dir.mkdir("arrange")
         self._cfg_dir.cd("arrange")
+        self._store = open_rule_store(self._cfg_dir.absolutePath())
 
         self._cache_rule_list = None
-
-    def _rule_list_path(self):
-        return self._cfg_dir.absoluteFilePath("rule_list.yaml")
+        self._content_cache: OrderedDict[int, Optional[dict]] = OrderedDict()
+
+        self._pending: dict[int | str, object] = {}
+        self._pending_cond = threading.Condition()
+        self._changed_at = 0.0
+        self._flush_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+    def _schedule_write(self, key: int | str, data: object):
+        with self._pending_cond:
+            self._pending[key] = data
+            self._changed_at = time.monotonic()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, daemon=True)
+                self._writer.start()
+            self._pending_cond.notify()
+
+    def _write_behind(self):
+        while True:
+            with self._pending_cond:
+                while not self._pending:
+                    self._pending_cond.wait()
+                while self._pending:
+                    remaining = self._changed_at + self._flush_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_cond.wait(remaining)
+
+            try:
+                self.flush()
+            except Exception:
+                traceback.print_exc()
+                # retry after another quiet period
+                with self._pending_cond:
+                    self._changed_at = time.monotonic()
+
+    def _pending_data(self, key: int | str, default: object) -> object:
+        with self._pending_cond:
+            return self._pending.get(key, default)
+
+    def flush(self):
+        """
+        Write the pending changes now.
+        """
+        with self._flush_lock:
+            with self._pending_cond:
+                pending = self._pending.copy()
+
+            for key, data in pending.items():
+                if key == _Rule_List_Key:
+                    self._store.save_rule_list(data)
+                elif data is _Delete:
+                    self._store.delete_rule_content(key)
+                else:
+                    self._store.save_rule_content(key, data)
+
+                # keep changes made while writing for the next flush
+                with self._pending_cond:
+                    if self._pending.get(key, None) is data:
+                        del self._pending[key]
 
     def get_rule_list(self):
-        if self._cache_rule_list is not None:
-            return self._cache_rule_list
-
-        path = self._rule_list_path()
-        if not os.path.isfile(path):
-            self._cache_rule_list = []
-            return self._cache_rule_list.copy()
-
-        with open(path, "r", encoding="utf8") as f:
-            self._cache_rule_list = yaml.safe_load(f)
-
-            if self._cache_rule_list is None:
-                self._cache_rule_list = []
-
-            return self._cache_rule_list.copy()
+        if self._cache_rule_list is None:
+            self._cache_rule_list = self._store.load_rule_list()
+        return self._cache_rule_list.copy()
 
     def save_rule_list(self, rule_list: list[RuleListItem]):
-        path = self._rule_list_path()
-        with open(path, "w", encoding="utf8") as f:
-            yaml.safe_dump(
-                rule_list,
-                f,
-                encoding="utf8",
-                allow_unicode=True,
-            )
         self._cache_rule_list = rule_list.copy()
+        self._schedule_write(_Rule_List_Key, _copy_items(rule_list))
 
     def update_rule_name(self, id: int, name: str):
         if self._cache_rule_list is not None:
@@ -88,39 +142,37 @@ class RuleDataHandler(object):
                 rule.name = name
                 break
 
-        path = self._rule_list_path()
-        with open(path, "w", encoding="utf8") as f:
-            yaml.safe_dump(
-                rule_list,
-                f,
-                encoding="utf8",
-                allow_unicode=True,
-            )
+        self._schedule_write(_Rule_List_Key, _copy_items(rule_list))
 
-    def _rule_content_path(self, id: int):
-        return self._cfg_dir.absoluteFilePath(f"rule_{id}.yaml")
+    def _cache_content(self, id: int, content: Optional[dict]):
+        self._content_cache[id] = content
+        self._content_cache.move_to_end(id)
+        if len(self._content_cache) > self._content_cache_size:
+            self._content_cache.popitem(last=False)
 
     def get_rule_content(self, id: int) -> Optional[dict]:
-        path = self._rule_content_path(id)
-        if not os.path.isfile(path):
+        """
+        The returned content is shared with the cache and must not be
+        modified.
+        """
+        content = self._pending_data(id, None)
+        if content is _Delete:
             return None
+        elif content is not None:
+            return content
 
-        with open(path, "r", encoding="utf8") as f:
-            return yaml.safe_load(f)
+        if id in self._content_cache:
+            self._content_cache.move_to_end(id)
+            return self._content_cache[id]
 
-    def update_rule_content(self, id: int, content: dict):
-        path = self._rule_content_path(id)
+        content = self._store.load_rule_content(id)
+        self._cache_content(id, content)
+        return content
 
-        with open(path, "w", encoding="utf8") as f:
-            yaml.safe_dump(
-                content,
-                f,
-                encoding="utf8",
-                allow_unicode=True,
-            )
+    def update_rule_content(self, id: int, content: dict):
+        self._cache_content(id, content)
+        self._schedule_write(id, content)
 
     def delete_rule_content(self, id: int):
-        path = self._rule_content_path(id)
-
-        if os.path.isfile(path):
-            os.remove(path)
+        self._content_cache.pop(id, None)
+        self._schedule_write(id, _Delete)
@@ -1,16 +1,24 @@
 import os
 import sys
+import threading
 import time
+import traceback
 from enum import Enum
 from typing import Optional
 
+import numpy as np
 from PySide6.QtCore import QDir, QMetaMethod, QObject, Signal, Slot
 from typing_extensions import override
 
+from arrange.match_preview import MatchPreview
+from arrange.rule_engine import PredicateCache, compile_rule
 from base.base_model import BaseModel
-from widget import ranger
+from base.journal import Last_Scan_Journal
+from base.last_scan import get_last_scan
+from infer.artifact_warehouse_handler import ArtifactWarehouseHandler
+from widget import LogOp, ranger
 
-from base import artifact
+from base import artifact, rollscore
 from tools.stringresources import load_string
 from .arrange_data import *
 
@@ -24,7 +32,6 @@ class RuleListModel(BaseModel):
         super().__init__(parent)
 
         self._rule_data_handler = RuleDataHandler()
-        self._is_dirty = False
 
         self._name_list: list[RuleListItem] = self._rule_data_handler.get_rule_list()
         self._selected_index = -1
@@ -48,7 +55,7 @@ class RuleListModel(BaseModel):
         self._name_list.insert(0, new_item)
         self._selected_index = 0
 
-        self._is_dirty = True
+        self._rule_data_handler.save_rule_list(self._name_list)
 
         self.name_list.emit(self._name_list)
         self.selected_index.emit(self._selected_index)
@@ -63,8 +70,8 @@ class RuleListModel(BaseModel):
         item = self._name_list.pop(self._selected_index)
         self._selected_index = -1
 
-        self._is_dirty = True
-        RuleDataHandler().delete_rule_content(item.id)
+        self._rule_data_handler.save_rule_list(self._name_list)
+        self._rule_data_handler.delete_rule_content(item.id)
 
         self.selected_index.emit(self._selected_index)
         self.name_list.emit(self._name_list)
@@ -76,7 +83,7 @@ class RuleListModel(BaseModel):
         item = self._name_list[index]
         item.name = name
 
-        self._is_dirty = True
+        self._rule_data_handler.update_rule_name(item.id, name)
 
         self.name_list_item_update.emit(index, name)
 
@@ -85,16 +92,15 @@ class RuleListModel(BaseModel):
 
     @override
     def on_close(self):
-        if self._is_dirty:
-            self._rule_data_handler.save_rule_list(self._name_list)
-            self._is_dirty = False
-
         self.name_list.disconnect()
         self.name_list_item_update.disconnect()
         self.selected_index.disconnect()
 
 
 class Statement(BaseModel):
+    # any change of the represent
+    changed = Signal()
+
     def init_data(self, represent: dict):
         pass
 
@@ -150,6 +156,7 @@ class ArtifactStarStatement(FilterStatement):
 
         self._four_star = value
         self.four_star.emit(value)
+        self.changed.emit()
 
     def get_five_star(self) -> bool:
         return self._five_star
@@ -160,6 +167,7 @@ class ArtifactStarStatement(FilterStatement):
 
         self._five_star = value
         self.five_star.emit(value)
+        self.changed.emit()
 
     @override
     def on_close(self):
@@ -197,6 +205,7 @@ class ArtifactLevelStatement(FilterStatement):
             return
 
         self._min_level = value
+        self.changed.emit()
 
     def get_max_level(self):
         return self._max_level
@@ -206,6 +215,7 @@ class ArtifactLevelStatement(FilterStatement):
             return
 
         self._max_level = value
+        self.changed.emit()
 
 
 class ArtifactLockStatement(FilterStatement):
@@ -236,6 +246,7 @@ class ArtifactLockStatement(FilterStatement):
             return
 
         self._lock = value
+        self.changed.emit()
 
     def get_unlock(self):
         return self._unclok
@@ -245,6 +256,7 @@ class ArtifactLockStatement(FilterStatement):
             return
 
         self._unclok = value
+        self.changed.emit()
 
 
 class ArtifactNameStatement(FilterStatement):
@@ -281,6 +293,7 @@ class ArtifactNameStatement(FilterStatement):
 
         self._filter_ids.append(id)
         self.filter_ids.emit(self._filter_ids)
+        self.changed.emit()
 
     def remove_filter_id(self, id: str):
         if id not in self._filter_ids:
@@ -288,6 +301,7 @@ class ArtifactNameStatement(FilterStatement):
 
         self._filter_ids.remove(id)
         self.filter_ids.emit(self._filter_ids)
+        self.changed.emit()
 
     def on_close(self):
         super().on_close()
@@ -327,6 +341,7 @@ class AttributeItem(Statement):
         if self._min == self._round(value):
             return
         self._min = self._round(value)
+        self.changed.emit()
 
     def get_min(self):
         return self._min
@@ -335,6 +350,7 @@ class AttributeItem(Statement):
         if self._max == self._round(value):
             return
         self._max = self._round(value)
+        self.changed.emit()
 
     def get_max(self):
         return self._max
@@ -412,9 +428,11 @@ class AttributeStatement(FilterStatement):
         item.set_max(max)
 
         item.item_deleted.connect(self.remove_attr_id)
+        item.changed.connect(self.changed)
 
         self._attr_items.append(item)
         self.attr_items.emit(self._attr_items)
+        self.changed.emit()
 
     def remove_attr_id(self, id: str):
         for idx, item in enumerate(self._attr_items):
@@ -430,6 +448,7 @@ class AttributeStatement(FilterStatement):
 
         self._avaliable_ids.append(id)
         self.attr_items.emit(self._attr_items)
+        self.changed.emit()
 
     def on_close(self):
         super().on_close()
@@ -450,6 +469,74 @@ class SubAttributeStatement(AttributeStatement):
         self._attributes_value_range = artifact.SubAttributes_Value_Range
 
 
+class ArtifactScoreStatement(FilterStatement):
+    score = Signal(str)
+
+    def __init__(self, parent: BaseModel | None = None) -> None:
+        super().__init__(parent)
+
+        self._score = "crit_value"
+        self._min, self._max = rollscore.Score_Ranges[self._score]
+
+    @override
+    def init_data(self, represent: dict):
+        self._score = represent["score"]
+        self._min = represent["min"]
+        self._max = represent["max"]
+
+    @override
+    def represent(self) -> dict:
+        return {
+            "type": "ArtifactScoreStatement",
+            "score": self._score,
+            "min": self._min,
+            "max": self._max,
+        }
+
+    def get_avaliable_scores(self):
+        return list(rollscore.Score_Ranges)
+
+    def get_score(self):
+        return self._score
+
+    def set_score(self, value: str):
+        if self._score == value:
+            return
+
+        self._score = value
+        self._min, self._max = rollscore.Score_Ranges[value]
+        self.score.emit(value)
+        self.changed.emit()
+
+    def get_default_range(self):
+        return rollscore.Score_Ranges[self._score]
+
+    def get_min(self):
+        return self._min
+
+    def set_min(self, value: float):
+        if self._min == value:
+            return
+
+        self._min = value
+        self.changed.emit()
+
+    def get_max(self):
+        return self._max
+
+    def set_max(self, value: float):
+        if self._max == value:
+            return
+
+        self._max = value
+        self.changed.emit()
+
+    @override
+    def on_close(self):
+        super().on_close()
+        self.score.disconnect()
+
+
 _filter_statement_types: list[type[FilterStatement]] = [
     ArtifactNameStatement,
     ArtifactStarStatement,
@@ -457,6 +544,7 @@ _filter_statement_types: list[type[FilterStatement]] = [
     MainAttributeStatement,
     SubAttributeStatement,
     ArtifactLockStatement,
+    ArtifactScoreStatement,
 ]
 
 
@@ -500,6 +588,7 @@ class OptStatement(Statement):
 
         self._opt = opt
         self.opt.emit(opt)
+        self.changed.emit()
 
     @override
     def on_close(self):
@@ -527,6 +616,12 @@ class RuleDetailModel(BaseModel):
     statement_added = Signal(int, Statement)
     statement_deled = Signal(int)
 
+    running = Signal(bool)
+    lock_progress = Signal(int)
+    log = Signal(LogOp, str)
+    # artifacts of the last scan matching the rule, -1 without a last scan
+    match_count = Signal(int)
+
     def __init__(self, id, parent: BaseModel | None = None):
         super().__init__(parent)
         self.id = id
@@ -535,19 +630,28 @@ class RuleDetailModel(BaseModel):
 
         self._statements: list[Statement] = []
         self._should_save = True
+        self._running = False
+        self._match_count = -1
+        self._preview = MatchPreview(
+            QDir("data:export").absoluteFilePath(Last_Scan_Journal),
+            self._preview_callback,
+        )
         self._init_data()
+        self._request_match_count()
 
-    def _save_represent(self):
+    def _represent(self):
         statement_presenters = []
         for statement in self._statements:
             statement_represent = statement.represent()
             if statement_represent:
                 statement_presenters.append(statement_represent)
 
-        represent_data = {
+        return {
             "statements": statement_presenters,
         }
-        RuleDataHandler().update_rule_content(self.id, represent_data)
+
+    def _save_represent(self):
+        RuleDataHandler().update_rule_content(self.id, self._represent())
 
     def _init_data(self):
         data = RuleDataHandler().get_rule_content(self.id)
@@ -590,6 +694,111 @@ class RuleDetailModel(BaseModel):
     def get_statements(self):
         return self._statements
 
+    def is_running(self):
+        return self._running
+
+    def get_match_count(self):
+        return self._match_count
+
+    def _request_match_count(self):
+        self._preview.request(self._represent())
+
+    def _preview_callback(self, count: int):
+        # called on the preview thread, the signal is queued to the UI
+        if self.is_close:
+            return
+        self._match_count = count
+        self.match_count.emit(count)
+
+    def lock_matched(self, lock: bool):
+        """
+        Lock or unlock the artifacts of the last scan matching the rule.
+        """
+        if self._running:
+            return
+
+        self.log.emit(LogOp.Clear, "")
+        self._running = True
+        self.running.emit(self._running)
+        self.lock_progress.emit(0)
+        self.t = threading.Thread(
+            target=self._lock_matched,
+            kwargs={
+                "content": self._represent(),
+                "lock": 1 if lock else 0,
+            },
+        )
+        self.t.start()
+
+    def _match(self, content: dict) -> Optional[list]:
+        """
+        Records of the last scan matching the rule `content` that can be
+        found in the warehouse, None without a last scan.
+        """
+        journal_path = QDir("data:export").absoluteFilePath(Last_Scan_Journal)
+        with get_last_scan(journal_path) as last_scan:
+            if not last_scan.load():
+                self._log(load_string("error_no_last_scan"))
+                return None
+
+            records = last_scan.records
+            cache = PredicateCache(last_scan.table, last_scan.index)
+            matched = np.flatnonzero(compile_rule(content).mask(cache.table, cache))
+        # records of scans made before the warehouse index was journaled
+        artifacts = [records[i] for i in matched if records[i].index >= 0]
+        if len(artifacts) < len(matched):
+            self._log(
+                load_string("lock_unplaced").format(len(matched) - len(artifacts))
+            )
+        return artifacts
+
+    def _lock_matched(self, content: dict, lock: int):
+        # the last scan is loaded here, not to block the UI on large scans
+        try:
+            artifacts = self._match(content)
+            if artifacts is None:
+                return
+            if not artifacts:
+                self._log(load_string("lock_none_matched"))
+                return
+
+            awh = ArtifactWarehouseHandler()
+            awh.lock_artifacts(artifacts, lock, self._lock_callback)
+        except Exception as e:
+            self._log(load_string("error_log_prefix").format(str(e)))
+            traceback.print_exc()
+        finally:
+            self._running = False
+            self.running.emit(self._running)
+
+    def _log(self, message: str):
+        self.log.emit(LogOp.Append, time.strftime("%H:%M:%S ") + message)
+
+    def _lock_callback(self, code: int, **argws):
+        if code == ArtifactWarehouseHandler.CB_INFO_PROGRAM:
+            self.lock_progress.emit(argws["program"])
+        elif code == ArtifactWarehouseHandler.CB_INFO_FINISH:
+            self.lock_progress.emit(100)
+            self._log(load_string("lock_finished"))
+        elif code == ArtifactWarehouseHandler.CB_WARN_LOCK_FAILED:
+            self._log(load_string("lock_failed") + f"\n{argws['artifact'].to_dict()}")
+        elif code == ArtifactWarehouseHandler.CB_WARN_LOCK_UNPLACED:
+            self._log(load_string("lock_unplaced").format(argws["count"]))
+        elif code == ArtifactWarehouseHandler.CB_ERR_LOCK_MISMATCH:
+            self._log(
+                load_string("error_lock_mismatch") + f"\n{argws['artifact'].to_dict()}"
+            )
+        elif code == ArtifactWarehouseHandler.CB_ERR_INTERRUPT_BY_USER:
+            self._log(load_string("error_lock_interrupt_by_user"))
+        elif code == ArtifactWarehouseHandler.CB_ERR_SWITCH_FAILED:
+            self._log(load_string("error_switch_genshin_failed"))
+        elif code == ArtifactWarehouseHandler.CB_ERR_FIND_ARTIFACT_COUNT_FAILED:
+            self._log(load_string("error_surface_not_artifacts_warehouse"))
+        elif code == ArtifactWarehouseHandler.CB_ERR_CANNOT_FIND_DET_CONFIG:
+            self._log(load_string("error_cannot_find_det_config"))
+        elif code == ArtifactWarehouseHandler.CB_ERR_PARAM_INVALID:
+            self._log(load_string("error_unknown"))
+
     @Slot()
     def _add_statement(
         self,
@@ -633,6 +842,8 @@ class RuleDetailModel(BaseModel):
         else:
             raise NotImplementedError()
 
+        self._request_match_count()
+
     @Slot()
     def _del_statement(self, sender: Statement):
         assert not isinstance(
@@ -721,6 +932,8 @@ class RuleDetailModel(BaseModel):
                 f"cannot delete statement {type(sender).__name__}"
             )
 
+        self._request_match_count()
+
     def _build_add_statement(self):
         add_statement = AddStatement(self)
         add_statement.statement_added.connect(
@@ -734,11 +947,13 @@ class RuleDetailModel(BaseModel):
         opt_statement = OptStatement(self)
         opt_statement.set_opt(opt)
         opt_statement.statement_added.connect(self._add_statement)
+        opt_statement.changed.connect(self._request_match_count)
         return opt_statement
 
     def _build_filter_statement(self, statement_type: type[FilterStatement]):
         statement = statement_type(self)
         statement.statement_deleted.connect(self._del_statement)
+        statement.changed.connect(self._request_match_count)
         return statement
 
     @override
@@ -752,6 +967,12 @@ class RuleDetailModel(BaseModel):
         self.statements_reset.disconnect()
         self.statement_added.disconnect()
         self.statement_deled.disconnect()
+        self.running.disconnect()
+        self.lock_progress.disconnect()
+        self.log.disconnect()
+
+        self._preview.close()
+        self.match_count.disconnect()
 
 
 class ArrangeModel(BaseModel):
@@ -44,8 +44,8 @@ from PySide6.QtWidgets import (
 from typing_extensions import override
 
 from tools.stringresources import load_string
-from widget import FlowLayout, LogView, Ranger
-from .arrange_data import RuleListItem
+from widget import FlowLayout, LogOp, LogView, Ranger
+from .arrange_data import RuleDataHandler, RuleListItem
 from .arrange_model import *
 
 _style = """
@@ -182,11 +182,33 @@ class RuleDetialView(QWidget):
         self._trash_btn.setText(load_string("delete_rule"))
         self._trash_btn.clicked.connect(self._model.delete_rule)
 
+        self._lock_btn = QPushButton()
+        self._lock_btn.setText(load_string("lock_matched"))
+        self._lock_btn.clicked.connect(lambda: self._model.lock_matched(True))
+        self._unlock_btn = QPushButton()
+        self._unlock_btn.setText(load_string("unlock_matched"))
+        self._unlock_btn.clicked.connect(lambda: self._model.lock_matched(False))
+        self._lock_progress_label = QLabel()
+        self._event_set_running(self._model.is_running())
+        self._model.running.connect(self._event_set_running)
+        self._model.lock_progress.connect(self._event_set_lock_progress)
+
+        self._log_view = LogView()
+        self._log_view.setMaximumHeight(120)
+        self._model.log.connect(self._event_log)
+
         title_layout = QHBoxLayout()
         title_layout.addWidget(self._title, stretch=1)
         title_layout.addSpacing(8)
+        title_layout.addWidget(self._lock_btn)
+        title_layout.addWidget(self._unlock_btn)
+        title_layout.addSpacing(8)
         title_layout.addWidget(self._trash_btn)
 
+        self._match_count_label = QLabel()
+        self._event_set_match_count(self._model.get_match_count())
+        self._model.match_count.connect(self._event_set_match_count)
+
         self._content_layout = QVBoxLayout()
         self._event_reset_layout(self._model.get_statements())
         self._model.statements_reset.connect(self._event_reset_layout)
@@ -203,10 +225,16 @@ class RuleDetialView(QWidget):
         scroll_layout.setSpacing(0)
         scroll_layout.addWidget(scroll_area)
 
+        status_layout = QHBoxLayout()
+        status_layout.addWidget(self._match_count_label, stretch=1)
+        status_layout.addWidget(self._lock_progress_label)
+
         layout = QVBoxLayout()
         layout.setSpacing(0)
         layout.addLayout(title_layout)
+        layout.addLayout(status_layout)
         layout.addLayout(scroll_layout, stretch=1)
+        layout.addWidget(self._log_view)
 
         self.setLayout(layout)
 
@@ -236,6 +264,30 @@ class RuleDetialView(QWidget):
         if name != self._title.text():
             self._title.setText(name)
 
+    @Slot(int)
+    def _event_set_match_count(self, count: int):
+        if count < 0:
+            self._match_count_label.setText(load_string("match_count_no_scan"))
+        else:
+            self._match_count_label.setText(load_string("match_count").format(count))
+
+    @Slot(bool)
+    def _event_set_running(self, running: bool):
+        self._lock_btn.setEnabled(not running)
+        self._unlock_btn.setEnabled(not running)
+        self._lock_progress_label.setVisible(running)
+
+    @Slot(int)
+    def _event_set_lock_progress(self, progress: int):
+        self._lock_progress_label.setText(load_string("lock_progress").format(progress))
+
+    @Slot(LogOp, str)
+    def _event_log(self, op: LogOp, message: str):
+        if op is LogOp.Append:
+            self._log_view.log(message)
+        elif op is LogOp.Clear:
+            self._log_view.clear()
+
     @Slot()
     def _event_reset_layout(self, statements: list[Statement]):
         self._delete_item_recursively(self._content_layout, False)
@@ -278,6 +330,8 @@ class RuleDetialView(QWidget):
             return self._artifact_name_layout(statement)
         elif isinstance(statement, AttributeStatement):
             return self._attribute_layout(statement)
+        elif isinstance(statement, ArtifactScoreStatement):
+            return self._artifact_score_layout(statement)
         else:
             raise NotImplementedError(f"cannot build container for {statement}")
 
@@ -476,6 +530,67 @@ class RuleDetialView(QWidget):
 
         return frame
 
+    def _artifact_score_layout(self, statement: ArtifactScoreStatement):
+        title = QLabel(load_string("title_artifact_score"))
+
+        score_ids = statement.get_avaliable_scores()
+        score_box = QComboBox()
+        for score_id in score_ids:
+            score_box.addItem(load_string(score_id))
+        score_box.setCurrentIndex(score_ids.index(statement.get_score()))
+        score_box.currentIndexChanged.connect(
+            lambda index: statement.set_score(score_ids[index])
+        )
+
+        ranger = Ranger()
+        ranger.set_title(load_string("score_range"))
+        ranger.set_range(statement.get_min(), statement.get_max())
+        ranger.set_placeholder(*statement.get_default_range())
+        ranger.set_input_width(8)
+        ranger.set_validator(QDoubleValidator())
+
+        def score_change(setter, set_min):
+            @Slot()
+            def inner(new_value):
+                new_value = new_value.replace(",", "").strip()
+                if new_value == "":
+                    new_value = statement.get_default_range()[0 if set_min else 1]
+                else:
+                    new_value = float(new_value)
+                setter(new_value)
+
+            return inner
+
+        ranger.min_text_edited.connect(score_change(statement.set_min, True))
+        ranger.max_text_edited.connect(score_change(statement.set_max, False))
+
+        @Slot(str)
+        def score_changed(score_id):
+            ranger.set_range(statement.get_min(), statement.get_max())
+            ranger.set_placeholder(*statement.get_default_range())
+
+        statement.score.connect(score_changed)
+
+        delete_icon = self.style().standardIcon(
+            QStyle.StandardPixmap.SP_DialogCloseButton
+        )
+        delete = QPushButton()
+        delete.setIcon(delete_icon)
+        delete.clicked.connect(statement.delete_statement)
+
+        layout = QHBoxLayout()
+        layout.addWidget(title)
+        layout.addWidget(score_box)
+        layout.addWidget(ranger)
+        layout.addStretch(1)
+        layout.addWidget(delete)
+
+        frame = QWidget()
+        frame.setObjectName("statement_box")
+        frame.setLayout(layout)
+
+        return frame
+
     def _artifact_name_layout(self, statement: ArtifactNameStatement):
         title = QLabel(load_string("title_artifact_name"))
 
@@ -842,6 +957,8 @@ class ArrangeUi(QWidget):
     @override
     def closeEvent(self, event: QCloseEvent):
         self._close_model(self._model)
+        # models save on close, write them before the window is gone
+        RuleDataHandler().flush()
         event.accept()
 
     @Slot()
@@ -0,0 +1,93 @@
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+import numpy as np
+
+from arrange.rule_engine import PredicateCache, compile_rule
+from base.last_scan import get_last_scan
+
+
+class MatchPreview(object):
+    """
+    Count the artifacts of the last scan matching a rule while it is edited.
+
+    Requests are debounced on a worker thread, only the last request of a
+    burst is evaluated once no other request came for `delay` seconds.
+    Masks are kept between evaluations, an edit only recomputes the filters
+    it changed. The last scan and its index come from `get_last_scan`,
+    shared with the other users of the journal. `callback` is called on the
+    worker thread with the count, or -1 if there is no last scan.
+    """
+
+    def __init__(
+        self,
+        journal_path: str,
+        callback: Callable[[int], None],
+        delay: float = 0.15,
+    ) -> None:
+        self._last_scan = get_last_scan(journal_path)
+        self._callback = callback
+        self._delay = delay
+
+        self._cond = threading.Condition()
+        self._content: Optional[dict] = None
+        self._requested_at = 0.0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        # state of the worker thread
+        self._version = None
+        self._cache: Optional[PredicateCache] = None
+
+    def request(self, content: dict):
+        with self._cond:
+            if self._closed:
+                return
+            self._content = content
+            self._requested_at = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._content is None and not self._closed:
+                    self._cond.wait()
+                while not self._closed:
+                    remaining = self._requested_at + self._delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+                content = self._content
+                self._content = None
+
+            try:
+                count = self._count(content)
+            except Exception:
+                traceback.print_exc()
+                continue
+            self._callback(count)
+
+    def _count(self, content: dict) -> int:
+        with self._last_scan as last_scan:
+            if not last_scan.load():
+                self._cache = None
+                return -1
+
+            if last_scan.version != self._version:
+                self._version = last_scan.version
+                self._cache = PredicateCache(last_scan.table, last_scan.index)
+            mask = compile_rule(content).mask(self._cache.table, self._cache)
+        self._cache.prune()
+        return int(np.count_nonzero(mask))
@@ -0,0 +1,356 @@
+from typing import Callable
+
+import numpy as np
+
+from arrange.rule_store import open_rule_store
+from base import yamlio
+from base.artifact import Aritifacts_Id, Attributes_Id, Max_Level
+from base.artifact_index import ArtifactIndex, Level_Bucket
+from base.rollscore import Scores
+
+# A rule is saved as the `represent` of its statements, filters joined by
+# `OptStatement`s: filter (opt filter)* opt_none, see `RuleDetailModel`.
+# "and" binds tighter than "or", a rule is evaluated as an "or" of groups
+# of filters joined by "and".
+#
+# Statements are compiled into filters, tuples of `Predicate`s computing
+# boolean masks over a table of `base.artifact_table.Artifact_Dtype`.
+# Predicates equal to an "or" of `base.artifact_index` keys name them and
+# are answered from the bitmaps of an index when there is one and the table
+# has at least `Index_Min_Rows` rows, below it the column tests are as fast.
+
+Opt_None = 0
+Opt_And = 1
+Opt_Or = 2
+
+# values of the table and of the rules are rounded differently
+_epsilon = 1e-6
+
+_max_level = max(Max_Level.values())
+
+Index_Min_Rows = 1000
+
+_artifact_index = {id: i for i, id in enumerate(Aritifacts_Id)}
+_attribute_index = {id: i for i, id in enumerate(Attributes_Id)}
+
+
+class Predicate(object):
+    """
+    An atomic test over a table, predicates with the same `key` compute
+    the same mask and are evaluated once per table by `PredicateCache`.
+
+    A predicate with `index_keys` matches the rows having any of them.
+    """
+
+    __slots__ = ("key", "_test", "index_keys")
+
+    def __init__(
+        self,
+        key: tuple,
+        test: Callable[[np.ndarray], np.ndarray],
+        index_keys: tuple[tuple, ...] | None = None,
+    ) -> None:
+        self.key = key
+        self._test = test
+        self.index_keys = index_keys
+
+    def __call__(self, table: np.ndarray) -> np.ndarray:
+        return self._test(table)
+
+
+# a statement matches if any of its predicates matches
+Filter = tuple[Predicate, ...]
+
+
+class PredicateCache(object):
+    """
+    Masks of predicates and filters over one table, keyed by the predicate
+    keys so rules sharing a filter compute it once.
+
+    With an `index` of a table of at least `Index_Min_Rows` rows,
+    predicates with index keys are answered from its bitmaps.
+    """
+
+    def __init__(self, table: np.ndarray, index: ArtifactIndex | None = None) -> None:
+        self.table = table
+        self.index = index if len(table) >= Index_Min_Rows else None
+        self._masks: dict[tuple, np.ndarray] = {}
+        self._used: set[tuple] = set()
+
+    def _evaluate(self, predicate: Predicate) -> np.ndarray:
+        if self.index is None or predicate.index_keys is None:
+            return predicate(self.table)
+        return self.index.mask(self.index.any_of(predicate.index_keys))
+
+    def predicate_mask(self, predicate: Predicate) -> np.ndarray:
+        self._used.add(predicate.key)
+        mask = self._masks.get(predicate.key, None)
+        if mask is None:
+            mask = self._evaluate(predicate)
+            self._masks[predicate.key] = mask
+        return mask
+
+    def filter_mask(self, filter: Filter) -> np.ndarray:
+        key = tuple(predicate.key for predicate in filter)
+        if len(key) == 1:
+            return self.predicate_mask(filter[0])
+
+        self._used.add(key)
+        mask = self._masks.get(key, None)
+        if mask is None:
+            mask = np.zeros(len(self.table), dtype=np.bool_)
+            for predicate in filter:
+                mask |= self.predicate_mask(predicate)
+            self._masks[key] = mask
+        return mask
+
+    def prune(self):
+        """
+        Drop the masks not used since the last prune, a cache kept across
+        edits of a rule then only holds the masks of its current filters.
+        """
+        self._masks = {
+            key: self._masks[key] for key in self._used if key in self._masks
+        }
+        self._used = set()
+
+
+def _compile_star(represent: dict) -> Filter:
+    stars = []
+    if represent["five_star"]:
+        stars.append(5)
+    if represent["four_star"]:
+        stars.append(4)
+    stars = np.array(sorted(stars), dtype=np.int8)
+
+    return (
+        Predicate(
+            ("star", tuple(stars.tolist())),
+            lambda table: np.isin(table["star"], stars),
+            tuple(("star", star) for star in stars.tolist()),
+        ),
+    )
+
+
+def _compile_level(represent: dict) -> Filter:
+    min_level = represent["min_level"]
+    max_level = represent["max_level"]
+
+    def level_test(table: np.ndarray):
+        level = table["level"]
+        return (level >= min_level) & (level <= max_level)
+
+    # ranges of whole buckets, the last bucket only holds the max level
+    index_keys = None
+    if min_level % Level_Bucket == 0 and (
+        (max_level + 1) % Level_Bucket == 0 or max_level >= _max_level
+    ):
+        buckets = range(min_level // Level_Bucket, max_level // Level_Bucket + 1)
+        index_keys = tuple(("level", bucket) for bucket in buckets)
+
+    return (Predicate(("level", min_level, max_level), level_test, index_keys),)
+
+
+def _compile_lock(represent: dict) -> Filter:
+    locks = []
+    if represent["lock"]:
+        locks.append(1)
+    if represent["unlock"]:
+        locks.append(0)
+    locks = np.array(sorted(locks), dtype=np.int8)
+
+    return (
+        Predicate(
+            ("lock", tuple(locks.tolist())),
+            lambda table: np.isin(table["lock"], locks),
+            tuple(("lock", lock) for lock in locks.tolist()),
+        ),
+    )
+
+
+def _compile_name(represent: dict) -> Filter:
+    set_ids = np.array(
+        sorted(_artifact_index[id] for id in represent["filter_ids"]), dtype=np.int16
+    )
+
+    return (
+        Predicate(
+            ("set", tuple(set_ids.tolist())),
+            lambda table: np.isin(table["set_id"], set_ids),
+            tuple(("set", set_id) for set_id in set_ids.tolist()),
+        ),
+    )
+
+
+def _attr_items(represent: dict) -> list[tuple[int, float, float]]:
+    return [
+        (
+            _attribute_index[item["id"]],
+            item["min"] - _epsilon,
+            item["max"] + _epsilon,
+        )
+        for item in represent["attr_items"]
+    ]
+
+
+def _main_attribute_predicate(attr_id: int, min: float, max: float) -> Predicate:
+    def main_attribute_test(table: np.ndarray):
+        values = table["main_value"]
+        return (table["main_attr_id"] == attr_id) & (values >= min) & (values <= max)
+
+    return Predicate(("main_attr", attr_id, min, max), main_attribute_test)
+
+
+def _sub_attribute_predicate(attr_id: int, min: float, max: float) -> Predicate:
+    def sub_attribute_test(table: np.ndarray):
+        values = table["sub_values"]
+        mask = (table["sub_attr_ids"] == attr_id) & (values >= min) & (values <= max)
+        return mask.any(axis=1)
+
+    return Predicate(("sub_attr", attr_id, min, max), sub_attribute_test)
+
+
+def _compile_main_attribute(represent: dict) -> Filter:
+    return tuple(
+        _main_attribute_predicate(*item) for item in sorted(_attr_items(represent))
+    )
+
+
+def _compile_sub_attribute(represent: dict) -> Filter:
+    return tuple(
+        _sub_attribute_predicate(*item) for item in sorted(_attr_items(represent))
+    )
+
+
+def _compile_score(represent: dict) -> Filter:
+    score = represent["score"]
+    score_function = Scores[score]
+    min = represent["min"] - _epsilon
+    max = represent["max"] + _epsilon
+
+    def score_test(table: np.ndarray):
+        values = score_function(table)
+        return (values >= min) & (values <= max)
+
+    return (Predicate(("score", score, min, max), score_test),)
+
+
+_compilers: dict[str, Callable[[dict], Filter]] = {
+    "ArtifactStarStatement": _compile_star,
+    "ArtifactLevelStatement": _compile_level,
+    "ArtifactLockStatement": _compile_lock,
+    "ArtifactNameStatement": _compile_name,
+    "MainAttributeStatement": _compile_main_attribute,
+    "SubAttributeStatement": _compile_sub_attribute,
+    "ArtifactScoreStatement": _compile_score,
+}
+
+
+class CompiledRule(object):
+    """
+    A rule compiled into "or" groups of "and" joined filters.
+    An attribute statement matches if any of its attributes is in range.
+    """
+
+    def __init__(self, groups: list[list[Filter]]) -> None:
+        self.groups = groups
+
+    def mask(
+        self, table: np.ndarray, cache: PredicateCache | None = None
+    ) -> np.ndarray:
+        """
+        Pass a `cache` of `table` to share masks with other rules.
+        """
+        if cache is None:
+            cache = PredicateCache(table)
+
+        mask = np.zeros(len(table), dtype=np.bool_)
+        for group in self.groups:
+            group_mask = cache.filter_mask(group[0])
+            for filter in group[1:]:
+                if not group_mask.any():
+                    break
+                group_mask = group_mask & cache.filter_mask(filter)
+            mask |= group_mask
+        return mask
+
+    def match(self, table: np.ndarray) -> np.ndarray:
+        """
+        Indexes of the artifacts of `table` matching the rule.
+        """
+        return np.flatnonzero(self.mask(table))
+
+
+def compile_rule(content: dict | None) -> CompiledRule:
+    """
+    Compile the content of a `rule_<id>.yaml`, a rule without filters
+    matches nothing.
+    """
+    groups: list[list[Filter]] = []
+    group: list[Filter] = []
+    statements = (content or {}).get("statements", None) or []
+    for statement in statements:
+        statement_type = statement["type"]
+        if statement_type == "AddStatement":
+            continue
+        elif statement_type == "OptStatement":
+            if statement["opt"] == Opt_And:
+                continue
+            # "or" and the trailing opt close the group
+            if group:
+                groups.append(group)
+            group = []
+        else:
+            compiler = _compilers.get(statement_type, None)
+            if compiler is None:
+                raise NotImplementedError(f"Unknown type {statement_type}")
+            group.append(compiler(statement))
+
+    if group:
+        groups.append(group)
+    return CompiledRule(groups)
+
+
+class RuleSet(object):
+    """
+    Rules evaluated together, predicates shared by several rules are
+    computed once per table.
+    """
+
+    def __init__(self, ids: list[int], names: list[str], rules: list[CompiledRule]):
+        self.ids = ids
+        self.names = names
+        self.rules = rules
+
+    def membership(
+        self, table: np.ndarray, index: ArtifactIndex | None = None
+    ) -> np.ndarray:
+        """
+        (artifacts, rules) boolean matrix, True where an artifact of
+        `table` matches the rule of the column, `index` is an optional
+        index of `table`.
+        """
+        cache = PredicateCache(table, index)
+        matrix = np.empty((len(table), len(self.rules)), dtype=np.bool_)
+        for i, rule in enumerate(self.rules):
+            matrix[:, i] = rule.mask(table, cache)
+        return matrix
+
+
+def load_rule(path: str) -> CompiledRule:
+    with open(path, "r", encoding="utf8") as f:
+        return compile_rule(yamlio.safe_load(f))
+
+
+def load_rule_list(rule_dir: str) -> RuleSet:
+    """
+    Load the rules of the rule list of `rule_dir` in list order, from
+    whichever store `open_rule_store` picks.
+    """
+    store = open_rule_store(rule_dir)
+    try:
+        items = store.load_rule_list()
+        rules = [compile_rule(store.load_rule_content(item.id)) for item in items]
+    finally:
+        store.close()
+    return RuleSet([item.id for item in items], [item.name for item in items], rules)
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+from base import yamlio
+
+
+class RuleListItem(object):
+    yaml_tag = "!rule_list_item"
+
+    def __init__(self) -> None:
+        self.id: int = time.time_ns() // 1000_000
+        self.name: str = ""
+
+    @staticmethod
+    def _constructor(loader, node):
+        data = loader.construct_mapping(node)
+        item = RuleListItem()
+        item.id = int(data["id"])
+        item.name = data["name"]
+        return item
+
+    @staticmethod
+    def _representer(dumper, item: "RuleListItem"):
+        data = {"id": item.id, "name": item.name}
+        return dumper.represent_mapping(RuleListItem.yaml_tag, data)
+
+
+yamlio.add_representer(RuleListItem, RuleListItem._representer)
+yamlio.add_constructor(RuleListItem.yaml_tag, RuleListItem._constructor)
+
+
+class YamlRuleStore(object):
+    """
+    `rule_list.yaml` and one `rule_<id>.yaml` per rule in `rule_dir`,
+    files are replaced atomically.
+    """
+
+    def __init__(self, rule_dir: str) -> None:
+        self._rule_dir = rule_dir
+
+    def _rule_list_path(self):
+        return os.path.join(self._rule_dir, "rule_list.yaml")
+
+    def _rule_content_path(self, id: int):
+        return os.path.join(self._rule_dir, f"rule_{id}.yaml")
+
+    def _write_yaml(self, path: str, data: object):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            yamlio.safe_dump(
+                data,
+                f,
+                encoding="utf8",
+                allow_unicode=True,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load_rule_list(self) -> list[RuleListItem]:
+        path = self._rule_list_path()
+        if not os.path.isfile(path):
+            return []
+
+        with open(path, "r", encoding="utf8") as f:
+            return yamlio.safe_load(f) or []
+
+    def save_rule_list(self, rule_list: list[RuleListItem]):
+        self._write_yaml(self._rule_list_path(), rule_list)
+
+    def load_rule_content(self, id: int) -> Optional[dict]:
+        path = self._rule_content_path(id)
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, "r", encoding="utf8") as f:
+            return yamlio.safe_load(f)
+
+    def save_rule_content(self, id: int, content: dict):
+        self._write_yaml(self._rule_content_path(id), content)
+
+    def delete_rule_content(self, id: int):
+        path = self._rule_content_path(id)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def close(self):
+        pass
+
+
+class SqliteRuleStore(object):
+    """
+    Rule list and rule contents in one sqlite file, contents are stored as
+    JSON and looked up by rule id. The connection is shared between
+    threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rule_list ("
+                "position INTEGER PRIMARY KEY, id INTEGER NOT NULL, name TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rule_content ("
+                "id INTEGER PRIMARY KEY, content TEXT NOT NULL)"
+            )
+
+    def load_rule_list(self) -> list[RuleListItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name FROM rule_list ORDER BY position"
+            ).fetchall()
+
+        rule_list = []
+        for id, name in rows:
+            item = RuleListItem()
+            item.id = id
+            item.name = name
+            rule_list.append(item)
+        return rule_list
+
+    def save_rule_list(self, rule_list: list[RuleListItem]):
+        rows = [(i, item.id, item.name) for i, item in enumerate(rule_list)]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rule_list")
+            self._conn.executemany(
+                "INSERT INTO rule_list (position, id, name) VALUES (?, ?, ?)", rows
+            )
+
+    def load_rule_content(self, id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM rule_content WHERE id = ?", (id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def save_rule_content(self, id: int, content: dict):
+        data = json.dumps(content, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rule_content (id, content) VALUES (?, ?)",
+                (id, data),
+            )
+
+    def delete_rule_content(self, id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rule_content WHERE id = ?", (id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# the rules of a folder are kept in this file once migrated
+_db_name = "rules.db"
+
+
+def open_rule_store(rule_dir: str) -> YamlRuleStore | SqliteRuleStore:
+    """
+    The sqlite store of `rule_dir` if it was migrated, the YAML files
+    otherwise.
+    """
+    db_path = os.path.join(rule_dir, _db_name)
+    if os.path.isfile(db_path):
+        return SqliteRuleStore(db_path)
+    return YamlRuleStore(rule_dir)
+
+
+def migrate_yaml_rules(rule_dir: str) -> int:
+    """
+    Copy the YAML rules of `rule_dir` into its sqlite store, the YAML files
+    are left as they are. Return the number of rules copied.
+    """
+    yaml_store = YamlRuleStore(rule_dir)
+    db_path = os.path.join(rule_dir, _db_name)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    sqlite_store = SqliteRuleStore(tmp_path)
+    rule_list = yaml_store.load_rule_list()
+    sqlite_store.save_rule_list(rule_list)
+    count = 0
+    for item in rule_list:
+        content = yaml_store.load_rule_content(item.id)
+        if content is not None:
+            sqlite_store.save_rule_content(item.id, content)
+            count += 1
+    sqlite_store.close()
+
+    # the store is only switched to once it is complete
+    os.replace(tmp_path, db_path)
+    return count
+
+
+if __name__ == "__main__":
+    # usage: python -m arrange.rule_store <rule_dir>
+    print(f"migrated {migrate_yaml_rules(sys.argv[1])} rules")
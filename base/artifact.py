@@ -108,3 +108,302 @@ SubAttributes_Value_Range = {
     "er": (0.036, 0.065 * 6),
     "em": (13, 23 * 6),
 }
+
+# attributes displayed with a percent sign, their values are kept as fractions
+Percent_Attributes = {
+    "hprate",
+    "atkrate",
+    "defrate",
+    "cr",
+    "cd",
+    "er",
+    "healing",
+    "phydmg",
+    "admg",
+    "gdmg",
+    "edmg",
+    "ddmg",
+    "hdmg",
+    "pdmg",
+    "crdmg",
+}
+
+# max level by star
+Max_Level = {
+    5: 20,
+    4: 16,
+}
+
+# value of one roll of a five star sub attribute, from the lowest to the highest tier,
+# four star rolls are `SubAttributes_Roll_Scale[4]` of the five star ones
+SubAttributes_Roll_Value = {
+    "hp": (209.13, 239.0, 268.88, 298.75),
+    "hprate": (0.0408, 0.046625, 0.05245, 0.058275),
+    "atk": (13.62, 15.56, 17.51, 19.45),
+    "atkrate": (0.0408, 0.046625, 0.05245, 0.058275),
+    "def": (16.2, 18.52, 20.83, 23.15),
+    "defrate": (0.051, 0.058288, 0.065575, 0.072875),
+    "cr": (0.0272, 0.0311, 0.034975, 0.03885),
+    "cd": (0.0544, 0.0622, 0.06995, 0.0777),
+    "er": (0.045325, 0.0518, 0.058275, 0.06475),
+    "em": (16.32, 18.65, 20.98, 23.31),
+}
+SubAttributes_Roll_Scale = {
+    5: 1.0,
+    4: 0.8,
+}
+
+# fmt: off
+_main_value_5_hprate = [
+    0.07, 0.09, 0.11, 0.129, 0.149, 0.169, 0.189, 0.209, 0.228, 0.248, 0.268,
+    0.288, 0.308, 0.328, 0.347, 0.367, 0.387, 0.407, 0.427, 0.446, 0.466,
+]
+_main_value_5_defrate = [
+    0.087, 0.112, 0.137, 0.162, 0.186, 0.211, 0.236, 0.261, 0.286, 0.31, 0.335,
+    0.36, 0.385, 0.409, 0.434, 0.459, 0.484, 0.508, 0.533, 0.558, 0.583,
+]
+_main_value_4_hprate = [
+    0.063, 0.081, 0.099, 0.116, 0.134, 0.152, 0.17, 0.188, 0.206, 0.223, 0.241,
+    0.259, 0.277, 0.295, 0.313, 0.33, 0.348,
+]
+_main_value_4_defrate = [
+    0.079, 0.101, 0.123, 0.146, 0.168, 0.19, 0.212, 0.235, 0.257, 0.279, 0.302,
+    0.324, 0.346, 0.368, 0.391, 0.413, 0.435,
+]
+
+# displayed main attribute value by star and level
+Main_Attributes_Value_By_Level = {
+    5: {
+        "hp": [
+            717, 920, 1123, 1326, 1530, 1733, 1936, 2139, 2342, 2545, 2749,
+            2952, 3155, 3358, 3561, 3764, 3967, 4171, 4374, 4577, 4780,
+        ],
+        "hprate": _main_value_5_hprate,
+        "atk": [
+            47, 60, 73, 86, 100, 113, 126, 139, 152, 166, 179,
+            192, 205, 219, 232, 245, 258, 272, 285, 298, 311,
+        ],
+        "atkrate": _main_value_5_hprate,
+        "defrate": _main_value_5_defrate,
+        "cr": [
+            0.047, 0.06, 0.073, 0.086, 0.099, 0.113, 0.126, 0.139, 0.152, 0.166, 0.179,
+            0.192, 0.205, 0.218, 0.232, 0.245, 0.258, 0.271, 0.284, 0.298, 0.311,
+        ],
+        "cd": [
+            0.093, 0.12, 0.146, 0.173, 0.199, 0.225, 0.252, 0.278, 0.305, 0.331, 0.357,
+            0.384, 0.41, 0.437, 0.463, 0.49, 0.516, 0.543, 0.569, 0.596, 0.622,
+        ],
+        "er": [
+            0.078, 0.1, 0.122, 0.144, 0.166, 0.188, 0.21, 0.232, 0.254, 0.276, 0.298,
+            0.32, 0.342, 0.364, 0.386, 0.408, 0.43, 0.452, 0.474, 0.496, 0.518,
+        ],
+        "em": [
+            28, 36, 44, 52, 60, 68, 76, 84, 91, 99, 107,
+            115, 123, 131, 139, 147, 155, 163, 171, 179, 187,
+        ],
+        "healing": [
+            0.054, 0.069, 0.084, 0.1, 0.115, 0.13, 0.145, 0.161, 0.176, 0.191, 0.206,
+            0.221, 0.237, 0.252, 0.267, 0.282, 0.298, 0.313, 0.328, 0.343, 0.359,
+        ],
+        "phydmg": _main_value_5_defrate,
+        "admg": _main_value_5_hprate,
+        "gdmg": _main_value_5_hprate,
+        "edmg": _main_value_5_hprate,
+        "ddmg": _main_value_5_hprate,
+        "hdmg": _main_value_5_hprate,
+        "pdmg": _main_value_5_hprate,
+        "crdmg": _main_value_5_hprate,
+    },
+    4: {
+        "hp": [
+            645, 828, 1011, 1194, 1377, 1559, 1742, 1925, 2108,
+            2291, 2474, 2657, 2839, 3022, 3205, 3388, 3571,
+        ],
+        "hprate": _main_value_4_hprate,
+        "atk": [
+            42, 54, 66, 78, 90, 102, 113, 125, 137,
+            149, 161, 173, 185, 197, 209, 221, 232,
+        ],
+        "atkrate": _main_value_4_hprate,
+        "defrate": _main_value_4_defrate,
+        "cr": [
+            0.042, 0.054, 0.066, 0.078, 0.09, 0.101, 0.113, 0.125, 0.137,
+            0.149, 0.161, 0.173, 0.185, 0.197, 0.208, 0.22, 0.232,
+        ],
+        "cd": [
+            0.084, 0.108, 0.131, 0.155, 0.179, 0.203, 0.227, 0.25, 0.274,
+            0.298, 0.322, 0.345, 0.369, 0.393, 0.417, 0.441, 0.464,
+        ],
+        "er": [
+            0.07, 0.09, 0.11, 0.129, 0.149, 0.169, 0.189, 0.209, 0.228,
+            0.248, 0.268, 0.288, 0.308, 0.328, 0.347, 0.367, 0.387,
+        ],
+        "em": [
+            25, 32, 39, 47, 54, 61, 68, 75, 82,
+            89, 97, 104, 111, 118, 125, 132, 139,
+        ],
+        "healing": [
+            0.048, 0.062, 0.076, 0.09, 0.103, 0.117, 0.131, 0.145, 0.159,
+            0.172, 0.186, 0.2, 0.214, 0.228, 0.241, 0.255, 0.269,
+        ],
+        "phydmg": _main_value_4_defrate,
+        "admg": _main_value_4_hprate,
+        "gdmg": _main_value_4_hprate,
+        "edmg": _main_value_4_hprate,
+        "ddmg": _main_value_4_hprate,
+        "hdmg": _main_value_4_hprate,
+        "pdmg": _main_value_4_hprate,
+        "crdmg": _main_value_4_hprate,
+    },
+}
+# fmt: on
+
+
+def _check_main_value_rows():
+    # all percent main attributes of a star grow with the level at the same
+    # rate, a mistyped value breaks the proportion to the atkrate row
+    for star, rows in Main_Attributes_Value_By_Level.items():
+        atkrate = rows["atkrate"]
+        for attr, row in rows.items():
+            if attr not in Percent_Attributes:
+                continue
+            assert len(row) == len(atkrate), (star, attr)
+            ratio = row[-1] / atkrate[-1]
+            for level, (value, base) in enumerate(zip(row, atkrate)):
+                assert abs(value - base * ratio) <= 0.002, (star, attr, level)
+
+
+_check_main_value_rows()
+
+Positions_Id = [
+    "flower",
+    "plume",
+    "sand",
+    "goblet",
+    "circlet",
+]
+
+# main and sub attributes
+Attributes_Id = [
+    "hp",
+    "hprate",
+    "atk",
+    "atkrate",
+    "def",
+    "defrate",
+    "cr",
+    "cd",
+    "er",
+    "em",
+    "healing",
+    "phydmg",
+    "admg",
+    "gdmg",
+    "edmg",
+    "ddmg",
+    "hdmg",
+    "pdmg",
+    "crdmg",
+]
+
+Max_Sub_Attributes = 4
+
+_artifact_index = {id: i for i, id in enumerate(Aritifacts_Id)}
+_position_index = {id: i for i, id in enumerate(Positions_Id)}
+_attribute_index = {id: i for i, id in enumerate(Attributes_Id)}
+
+
+class ArtifactRecord(object):
+    """
+    One scanned artifact, set, slot and attributes are stored as indexes
+    into `Aritifacts_Id`, `Positions_Id` and `Attributes_Id`, -1 if unknown.
+    `index` is the position of the artifact in the warehouse list,
+    row major from the top left card, -1 if unknown.
+    """
+
+    __slots__ = (
+        "set_id",
+        "pos_id",
+        "star",
+        "level",
+        "lock",
+        "main_attr_id",
+        "main_value",
+        "sub_attr_ids",
+        "sub_values",
+        "equipper",
+        "index",
+    )
+
+    def __init__(
+        self,
+        set_id: int,
+        pos_id: int,
+        star: int,
+        level: int,
+        lock: int,
+        main_attr_id: int,
+        main_value: float,
+        sub_attr_ids: tuple[int, ...],
+        sub_values: tuple[float, ...],
+        equipper: str,
+        index: int = -1,
+    ) -> None:
+        self.set_id = set_id
+        self.pos_id = pos_id
+        self.star = star
+        self.level = level
+        self.lock = lock
+        self.main_attr_id = main_attr_id
+        self.main_value = main_value
+        self.sub_attr_ids = sub_attr_ids
+        self.sub_values = sub_values
+        self.equipper = equipper
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return Aritifacts_Id[self.set_id] if self.set_id >= 0 else ""
+
+    @property
+    def pos(self) -> str:
+        return Positions_Id[self.pos_id] if self.pos_id >= 0 else ""
+
+    @property
+    def main_attr(self) -> str:
+        return Attributes_Id[self.main_attr_id] if self.main_attr_id >= 0 else ""
+
+    @property
+    def sub_attrs(self) -> list[str]:
+        return [Attributes_Id[i] for i in self.sub_attr_ids]
+
+    @classmethod
+    def from_dict(cls, artifact: dict) -> "ArtifactRecord":
+        return cls(
+            _artifact_index.get(artifact["name"].strip(), -1),
+            _position_index.get(artifact["pos"], -1),
+            artifact["star"],
+            artifact["level"],
+            artifact["lock"],
+            _attribute_index.get(artifact["main_attr"], -1),
+            artifact["main_value"],
+            tuple(_attribute_index[attr] for attr in artifact["sub_attrs"]),
+            tuple(artifact["sub_values"]),
+            artifact["equipper"],
+            artifact.get("index", -1),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "pos": self.pos,
+            "star": self.star,
+            "level": self.level,
+            "lock": self.lock,
+            "main_attr": self.main_attr,
+            "main_value": self.main_value,
+            "sub_attrs": self.sub_attrs,
+            "sub_values": list(self.sub_values),
+            "equipper": self.equipper,
+            "index": self.index,
+        }
@@ -0,0 +1,201 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+from base.artifact import Max_Sub_Attributes
+
+# Inverted index of a table of `base.artifact_table.Artifact_Dtype`, every
+# key maps to a bitmap of the rows having it. Bitmaps are NumPy bit packed
+# (`np.packbits` order) uint8 arrays, 1 bit per artifact.
+#
+# keys:
+#   ("set", set_id), ("pos", pos_id), ("main", attr_id), ("sub", attr_id),
+#   ("star", star), ("level", level // Level_Bucket), ("lock", lock),
+#   ("equipper", name), the empty name for artifacts nobody equips
+
+Level_Bucket = 4
+
+# single value columns indexed as (key name, column)
+_columns = (
+    ("set", "set_id"),
+    ("pos", "pos_id"),
+    ("main", "main_attr_id"),
+    ("star", "star"),
+    ("lock", "lock"),
+)
+
+
+def _bits(rows: np.ndarray) -> np.ndarray:
+    return (0x80 >> (rows & 7)).astype(np.uint8)
+
+
+def _row_keys(table: np.ndarray) -> dict[str, np.ndarray]:
+    keys = {name: table[column] for name, column in _columns}
+    keys["level"] = table["level"] // Level_Bucket
+    return keys
+
+
+class ArtifactIndex(object):
+    """
+    Bitmaps of the index keys over the artifacts of one scan.
+
+    `update` takes the table of a later scan and only changes the bits of
+    the rows that differ, rows are matched by position.
+    """
+
+    def __init__(
+        self, table: np.ndarray, equippers: Optional[list[str]] = None
+    ) -> None:
+        self._bitmaps: dict[tuple, np.ndarray] = {}
+        self._table = table[:0]
+        self._equippers: list[str] = []
+        self.update(table, equippers)
+
+    def __len__(self):
+        return len(self._table)
+
+    def _bitmap(self, key: tuple) -> np.ndarray:
+        bitmap = self._bitmaps.get(key, None)
+        if bitmap is None:
+            bitmap = np.zeros((len(self._table) + 7) // 8, dtype=np.uint8)
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    def _set(self, key: tuple, rows: np.ndarray):
+        np.bitwise_or.at(self._bitmap(key), rows >> 3, _bits(rows))
+
+    def _clear(self, key: tuple, rows: np.ndarray):
+        bitmap = self._bitmaps.get(key, None)
+        if bitmap is not None:
+            np.bitwise_and.at(bitmap, rows >> 3, ~_bits(rows))
+
+    def _apply(self, name: str, rows: np.ndarray, values: np.ndarray, set: bool):
+        if len(rows) == 0:
+            return
+        # rows grouped by value, one ufunc call per key
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        rows = rows[order]
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        ends = np.r_[starts[1:], len(values)]
+        for start, end in zip(starts, ends):
+            key = (name, values[start].item())
+            if set:
+                self._set(key, rows[start:end])
+            else:
+                self._clear(key, rows[start:end])
+
+    def _apply_subs(self, table: np.ndarray, rows: np.ndarray, set: bool):
+        sub_attr_ids = table["sub_attr_ids"][rows]
+        sub_rows = np.repeat(rows, Max_Sub_Attributes)
+        sub_attr_ids = sub_attr_ids.reshape(-1)
+        valid = sub_attr_ids >= 0
+        self._apply("sub", sub_rows[valid], sub_attr_ids[valid], set)
+
+    def _apply_equippers(self, equippers: list[str], rows: np.ndarray, set: bool):
+        groups: dict[str, list[int]] = {}
+        for row in rows.tolist():
+            groups.setdefault(equippers[row], []).append(row)
+        for name, group in groups.items():
+            group = np.array(group, dtype=np.int64)
+            if set:
+                self._set(("equipper", name), group)
+            else:
+                self._clear(("equipper", name), group)
+
+    def update(self, table: np.ndarray, equippers: Optional[list[str]] = None) -> int:
+        """
+        Index `table` in place of the indexed one, return the number of
+        rows that changed.
+        """
+        if equippers is None:
+            equippers = [""] * len(table)
+        old_table = self._table
+        old_equippers = self._equippers
+        old_count = len(old_table)
+        count = len(table)
+
+        shared = min(old_count, count)
+        changed_rows = np.flatnonzero(table[:shared] != old_table[:shared])
+        equipper_rows = np.array(
+            [row for row in range(shared) if equippers[row] != old_equippers[row]],
+            dtype=np.int64,
+        )
+        removed_rows = np.arange(shared, old_count, dtype=np.int64)
+        added_rows = np.arange(shared, count, dtype=np.int64)
+
+        # clear the old keys of changed and removed rows
+        old_rows = np.concatenate([changed_rows, removed_rows])
+        old_keys = _row_keys(old_table)
+        for name, values in old_keys.items():
+            self._apply(name, old_rows, values[old_rows], False)
+        self._apply_subs(old_table, old_rows, False)
+        self._apply_equippers(
+            old_equippers, np.concatenate([equipper_rows, removed_rows]), False
+        )
+
+        # resize to the new table, bits past the end are cleared above
+        size = (count + 7) // 8
+        for key, bitmap in self._bitmaps.items():
+            if len(bitmap) != size:
+                resized = np.zeros(size, dtype=np.uint8)
+                resized[: min(size, len(bitmap))] = bitmap[:size]
+                self._bitmaps[key] = resized
+        self._table = table
+        self._equippers = equippers
+
+        # set the new keys of changed and added rows
+        new_rows = np.concatenate([changed_rows, added_rows])
+        new_keys = _row_keys(table)
+        for name, values in new_keys.items():
+            self._apply(name, new_rows, values[new_rows], True)
+        self._apply_subs(table, new_rows, True)
+        self._apply_equippers(
+            equippers, np.concatenate([equipper_rows, added_rows]), True
+        )
+
+        # keys no row has any more
+        for key in [key for key, bitmap in self._bitmaps.items() if not bitmap.any()]:
+            del self._bitmaps[key]
+
+        return len(np.union1d(changed_rows, equipper_rows)) + abs(count - old_count)
+
+    def keys(self) -> Iterable[tuple]:
+        return self._bitmaps.keys()
+
+    def bitmap(self, key: tuple) -> np.ndarray:
+        """
+        Bitmap of `key`, empty if no artifact has it, must not be modified.
+        """
+        bitmap = self._bitmaps.get(key, None)
+        if bitmap is None:
+            return np.zeros((len(self._table) + 7) // 8, dtype=np.uint8)
+        return bitmap
+
+    def any_of(self, keys: Iterable[tuple]) -> np.ndarray:
+        bitmap = np.zeros((len(self._table) + 7) // 8, dtype=np.uint8)
+        for key in keys:
+            if key in self._bitmaps:
+                bitmap |= self._bitmaps[key]
+        return bitmap
+
+    def all_of(self, keys: Iterable[tuple]) -> np.ndarray:
+        bitmap = np.full((len(self._table) + 7) // 8, 0xFF, dtype=np.uint8)
+        for key in keys:
+            bitmap &= self.bitmap(key)
+        return self._trim(bitmap)
+
+    def _trim(self, bitmap: np.ndarray) -> np.ndarray:
+        tail = len(self._table) & 7
+        if tail:
+            bitmap[-1] &= (0xFF << (8 - tail)) & 0xFF
+        return bitmap
+
+    def mask(self, bitmap: np.ndarray) -> np.ndarray:
+        """
+        A bitmap as a boolean mask over the rows of the table.
+        """
+        return np.unpackbits(bitmap, count=len(self._table)).view(np.bool_)
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(np.unpackbits(bitmap, count=len(self._table)).sum())
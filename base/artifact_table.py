@@ -0,0 +1,99 @@
+import numpy as np
+
+from base.artifact import Max_Sub_Attributes, ArtifactRecord
+
+# Columnar form of a list of `ArtifactRecord`, one row per artifact.
+# Missing sub attributes are padded with id -1 and value 0.
+Artifact_Dtype = np.dtype(
+    [
+        ("set_id", np.int16),
+        ("pos_id", np.int8),
+        ("star", np.int8),
+        ("level", np.int8),
+        ("lock", np.int8),
+        ("main_attr_id", np.int8),
+        ("main_value", np.float64),
+        ("sub_count", np.int8),
+        ("sub_attr_ids", np.int8, (Max_Sub_Attributes,)),
+        ("sub_values", np.float64, (Max_Sub_Attributes,)),
+        ("index", np.int32),
+    ]
+)
+
+
+def to_table(records: list[ArtifactRecord]) -> np.ndarray:
+    """
+    Pack records into a structured array of `Artifact_Dtype`,
+    equippers are not part of the table.
+    """
+    n = len(records)
+    table = np.empty(n, dtype=Artifact_Dtype)
+    table["set_id"] = [r.set_id for r in records]
+    table["pos_id"] = [r.pos_id for r in records]
+    table["star"] = [r.star for r in records]
+    table["level"] = [r.level for r in records]
+    table["lock"] = [r.lock for r in records]
+    table["main_attr_id"] = [r.main_attr_id for r in records]
+    table["main_value"] = [r.main_value for r in records]
+
+    sub_attr_ids = np.full((n, Max_Sub_Attributes), -1, dtype=np.int8)
+    sub_values = np.zeros((n, Max_Sub_Attributes), dtype=np.float64)
+    sub_count = np.empty(n, dtype=np.int8)
+    for i, r in enumerate(records):
+        count = min(len(r.sub_attr_ids), Max_Sub_Attributes)
+        sub_attr_ids[i, :count] = r.sub_attr_ids[:count]
+        sub_values[i, :count] = r.sub_values[:count]
+        sub_count[i] = count
+    table["sub_count"] = sub_count
+    table["sub_attr_ids"] = sub_attr_ids
+    table["sub_values"] = sub_values
+    table["index"] = [r.index for r in records]
+    return table
+
+
+def from_table(table: np.ndarray, equippers: list[str] | None = None):
+    """
+    Unpack a table of `Artifact_Dtype` into records.
+    """
+    records = []
+    for i, row in enumerate(table.tolist()):
+        (
+            set_id,
+            pos_id,
+            star,
+            level,
+            lock,
+            main_attr_id,
+            main_value,
+            sub_count,
+            sub_attr_ids,
+            sub_values,
+            index,
+        ) = row
+        records.append(
+            ArtifactRecord(
+                set_id,
+                pos_id,
+                star,
+                level,
+                lock,
+                main_attr_id,
+                main_value,
+                tuple(sub_attr_ids[:sub_count]),
+                tuple(sub_values[:sub_count]),
+                equippers[i] if equippers is not None else "",
+                index,
+            )
+        )
+    return records
+
+
+def sub_value_table(table: np.ndarray, attr_count: int) -> np.ndarray:
+    """
+    Sub attribute values as a dense (artifacts, attr_count) matrix indexed
+    by attribute id, 0 where an artifact does not have the attribute.
+    """
+    values = np.zeros((len(table), attr_count), dtype=np.float64)
+    rows, cols = np.nonzero(table["sub_attr_ids"] >= 0)
+    values[rows, table["sub_attr_ids"][rows, cols]] = table["sub_values"][rows, cols]
+    return values
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from typing import Iterator
+
+from base.artifact import ArtifactRecord
+
+# journal of the last scan in the export data folder
+Last_Scan_Journal = "scan.jsonl"
+
+# suffix of a journal being written
+_temp_suffix = ".tmp"
+
+
+class ScanJournal(object):
+    """
+    Append only JSON lines file of the artifacts of one scan, one artifact
+    per line as `ArtifactRecord.to_dict` returns it.
+
+    Writes are buffered, the file is synced to disk every `sync_count`
+    artifacts or `sync_interval` seconds, whichever comes first, so a crash
+    loses at most the artifacts since the last sync.
+
+    The artifacts are written to `temp_path`, `path` is only replaced by
+    `commit`, a failed scan keeps the journal of the last one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sync_count: int = 64,
+        sync_interval: float = 2.0,
+        buffer_size: int = 1 << 16,
+    ) -> None:
+        self.path = path
+        self.temp_path = path + _temp_suffix
+        self._sync_count = sync_count
+        self._sync_interval = sync_interval
+        self._file = open(self.temp_path, "w", encoding="utf8", buffering=buffer_size)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.count = 0
+
+    def append(self, artifact: ArtifactRecord):
+        self._file.write(json.dumps(artifact.to_dict(), ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+        self._unsynced += 1
+
+        if (
+            self._unsynced >= self._sync_count
+            or time.monotonic() - self._last_sync >= self._sync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def commit(self):
+        """
+        Close the journal and move it to `path`.
+        """
+        self.close()
+        if os.path.exists(self.temp_path):
+            os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        """
+        Close the journal and remove it unless committed, `path` is kept.
+        """
+        self.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.discard()
+
+
+def read_journal(path: str) -> Iterator[ArtifactRecord]:
+    """
+    Iterate the artifacts of a journal, a last line cut by a crash is skipped.
+    """
+    with open(path, "r", encoding="utf8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            yield ArtifactRecord.from_dict(json.loads(line))
+
+
+def read_raw_scan(path: str) -> Iterator[ArtifactRecord]:
+    """
+    Iterate the artifacts of a raw scan, either a journal (.jsonl) or the
+    JSON list of the "none" export format. Lists written one artifact per
+    line are streamed, other lists are loaded at once.
+    """
+    if path.endswith(".jsonl"):
+        yield from read_journal(path)
+        return
+
+    with open(path, "r", encoding="utf8") as f:
+        head = f.readline().strip()
+        item = f.readline().strip()
+        if head != "[" or not (item.endswith("}") or item.endswith("},")):
+            f.seek(0)
+            for artifact in json.load(f):
+                yield ArtifactRecord.from_dict(artifact)
+            return
+
+        while item and item != "]":
+            yield ArtifactRecord.from_dict(json.loads(item.rstrip(",")))
+            item = f.readline().strip()
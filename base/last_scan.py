@@ -0,0 +1,80 @@
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from base.artifact import ArtifactRecord
+from base.artifact_index import ArtifactIndex
+from base.artifact_table import to_table
+from base.journal import read_journal
+
+
+class LastScan(object):
+    """
+    The artifacts of a scan journal as records, as a table and as its
+    index, loaded once for every user of the journal and reloaded when it
+    changes. A new journal updates the index in place, only the artifacts
+    it changed are reindexed.
+
+    Hold it (`with last_scan:`) while calling `load` and reading the
+    artifacts, a reload on another thread waits for the holder. `version`
+    changes with every reload, for caches over the table.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp = None
+
+        self.version = 0
+        self.records: list[ArtifactRecord] = []
+        self.table: Optional[np.ndarray] = None
+        self.index: Optional[ArtifactIndex] = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self._lock.release()
+
+    def load(self) -> bool:
+        """
+        Reload the journal if it changed, False if there is none.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                self._stamp = None
+                return False
+
+            # a new scan replaces the journal, see `ScanJournal.commit`
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp != self._stamp:
+                records = list(read_journal(self.path))
+                table = to_table(records)
+                equippers = [r.equipper for r in records]
+                if self.index is None:
+                    self.index = ArtifactIndex(table, equippers)
+                else:
+                    self.index.update(table, equippers)
+                self.records = records
+                self.table = table
+                self.version += 1
+                self._stamp = stamp
+            return True
+
+
+_last_scans: dict[str, LastScan] = {}
+_last_scans_lock = threading.Lock()
+
+
+def get_last_scan(path: str) -> LastScan:
+    with _last_scans_lock:
+        last_scan = _last_scans.get(path, None)
+        if last_scan is None:
+            last_scan = LastScan(path)
+            _last_scans[path] = last_scan
+        return last_scan
@@ -0,0 +1,103 @@
+import os
+from typing import Any, Callable, Optional, TypeVar
+
+from base import yamlio
+from base.artifact import Aritifacts_Id, Attributes_Id, Positions_Id
+
+T = TypeVar("T")
+
+# id table the keys of a mapper are compiled against, by file name prefix
+_id_tables = {
+    "artifact_name_": Aritifacts_Id,
+    "artifact_pos_": Positions_Id,
+    "artifact_attr_": Attributes_Id,
+}
+
+
+class CompiledMapper(object):
+    """
+    A mapper yaml compiled against its id table, `by_id[i]` is the value
+    of the i-th id, None if the mapper has no value for it. `by_id` has one
+    more trailing None so the unknown id -1 maps to None as well.
+    """
+
+    __slots__ = ("mapping", "by_id")
+
+    def __init__(self, mapping: dict[str, str], ids: list[str]) -> None:
+        self.mapping = mapping
+        self.by_id = tuple(mapping.get(id, None) for id in ids) + (None,)
+
+
+class MapperRegistry(object):
+    """
+    Mappers of one folder, every file is loaded once and loaded again only
+    after its mtime changed, together with everything built from it.
+    """
+
+    def __init__(self, mapper_dir: str) -> None:
+        self._mapper_dir = mapper_dir
+        self._mtimes: dict[str, float] = {}
+        self._data: dict[str, Any] = {}
+        self._compiled: dict[str, CompiledMapper] = {}
+        self._derived: dict[tuple[str, Callable, tuple[str, ...]], Any] = {}
+
+    def _refresh(self, name: str):
+        mtime = os.stat(os.path.join(self._mapper_dir, name)).st_mtime
+        if self._mtimes.get(name, None) == mtime:
+            return
+
+        with open(os.path.join(self._mapper_dir, name), "r", encoding="utf8") as f:
+            self._data[name] = yamlio.safe_load(f)
+        self._mtimes[name] = mtime
+        self._compiled.pop(name, None)
+        for key in [key for key in self._derived if name in (key[0], *key[2])]:
+            del self._derived[key]
+
+    def get(self, name: str) -> Any:
+        """
+        Content of the mapper file `name`, e.g. "artifact_name_zh.yaml".
+        """
+        self._refresh(name)
+        return self._data[name]
+
+    def compiled(self, name: str) -> CompiledMapper:
+        self._refresh(name)
+        compiled = self._compiled.get(name, None)
+        if compiled is None:
+            ids: Optional[list[str]] = None
+            for prefix, id_table in _id_tables.items():
+                if name.startswith(prefix):
+                    ids = id_table
+                    break
+            if ids is None:
+                raise ValueError(f"no id table for mapper {name}")
+
+            compiled = CompiledMapper(self._data[name], ids)
+            self._compiled[name] = compiled
+        return compiled
+
+    def derived(self, name: str, build: Callable[..., T], *others: str) -> T:
+        """
+        `build(content, *other_contents)` of the mapper file `name` and of
+        the files `others`, e.g. a matcher, built once per version of the
+        files.
+        """
+        for file in (name, *others):
+            self._refresh(file)
+        key = (name, build, others)
+        value = self._derived.get(key, None)
+        if value is None:
+            value = build(self._data[name], *(self._data[file] for file in others))
+            self._derived[key] = value
+        return value
+
+
+_registries: dict[str, MapperRegistry] = {}
+
+
+def get_mapper_registry(mapper_dir: str) -> MapperRegistry:
+    registry = _registries.get(mapper_dir, None)
+    if registry is None:
+        registry = MapperRegistry(mapper_dir)
+        _registries[mapper_dir] = registry
+    return registry
@@ -0,0 +1,187 @@
+from itertools import combinations_with_replacement
+from typing import Callable
+
+import numpy as np
+
+from base.artifact import (
+    Attributes_Id,
+    Max_Level,
+    Percent_Attributes,
+    SubAttributes_Roll_Scale,
+    SubAttributes_Roll_Value,
+    Subattributes_Id,
+)
+from base.rolltable import max_rolls, value_key
+
+# Roll decomposition and scores of the sub attributes of a table of
+# `base.artifact_table.Artifact_Dtype`, computed for all artifacts at once.
+#
+# Every roll of a sub attribute adds one of four tiers, 70% to 100% of the
+# highest one. A displayed total is looked up in a roll-sum table, indexed
+# by `rolltable.value_key`, giving the rolls and the sum of the tier indexes
+# (0 lowest to 3 highest per roll) of the sub attribute. Totals reachable
+# with different roll counts are read as the fewest rolls.
+
+# sub attribute index of every attribute id, the extra last entry maps the
+# padding id -1 to -1
+_sub_index = np.array(
+    [
+        Subattributes_Id.index(id) if id in Subattributes_Id else -1
+        for id in Attributes_Id
+    ]
+    + [-1],
+    dtype=np.int8,
+)
+
+# value to key factor of every sub attribute, see `rolltable.value_key`
+_key_scale = np.array(
+    [1000.0 if id in Percent_Attributes else 1.0 for id in Subattributes_Id] + [0.0],
+    dtype=np.float64,
+)
+
+# highest tier of one five star roll of every sub attribute
+_max_roll = np.array(
+    [SubAttributes_Roll_Value[id][-1] for id in Subattributes_Id] + [1.0],
+    dtype=np.float64,
+)
+
+_cr_index = Subattributes_Id.index("cr")
+_cd_index = Subattributes_Id.index("cd")
+
+
+class RollSumTable(object):
+    """
+    Rolls and tier sums of every displayed total of the sub attributes of
+    one star, as (sub attributes, keys) arrays. Keys between two totals
+    take the nearest one.
+    """
+
+    def __init__(self, star: int) -> None:
+        scale = SubAttributes_Roll_Scale[star]
+        rolls = max_rolls(star, Max_Level[star])
+
+        width = 1 + max(
+            value_key(id, SubAttributes_Roll_Value[id][-1] * scale * rolls)
+            for id in Subattributes_Id
+        )
+        self.width = width
+        self.rolls = np.zeros((len(Subattributes_Id), width), dtype=np.int8)
+        self.tier_sums = np.zeros((len(Subattributes_Id), width), dtype=np.int8)
+
+        for i, id in enumerate(Subattributes_Id):
+            tiers = [v * scale for v in SubAttributes_Roll_Value[id]]
+            legal = np.zeros(width, dtype=np.bool_)
+            # fewer rolls first, a total keeps the first decomposition found
+            for n in range(1, rolls + 1):
+                for combination in combinations_with_replacement(range(4), n):
+                    key = value_key(id, sum(tiers[t] for t in combination))
+                    if not legal[key]:
+                        legal[key] = True
+                        self.rolls[i, key] = n
+                        self.tier_sums[i, key] = sum(combination)
+
+            # nearest legal key of every key, ties to the lower one
+            keys = np.flatnonzero(legal)
+            right = np.clip(np.searchsorted(keys, np.arange(width)), 0, len(keys) - 1)
+            left = np.clip(right - 1, 0, len(keys) - 1)
+            positions = np.arange(width)
+            nearest = np.where(
+                positions - keys[left] <= keys[right] - positions,
+                keys[left],
+                keys[right],
+            )
+            # keys below half of the lowest roll are no roll at all
+            nearest[positions * 2 < keys[0]] = 0
+            self.rolls[i] = self.rolls[i, nearest]
+            self.tier_sums[i] = self.tier_sums[i, nearest]
+
+
+_roll_sum_tables = {star: RollSumTable(star) for star in SubAttributes_Roll_Scale}
+
+
+def decompose_rolls(table: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rolls and tier sums of every sub attribute of `table`, as two
+    (artifacts, Max_Sub_Attributes) arrays, 0 for missing sub attributes
+    and artifacts of other stars.
+    """
+    sub_index = _sub_index[table["sub_attr_ids"]]
+    keys = np.floor(table["sub_values"] * _key_scale[sub_index] + 0.5).astype(np.int32)
+
+    rolls = np.zeros(sub_index.shape, dtype=np.int8)
+    tier_sums = np.zeros(sub_index.shape, dtype=np.int8)
+    for star, roll_sum_table in _roll_sum_tables.items():
+        rows, cols = np.nonzero(
+            (table["star"] == star)[:, np.newaxis] & (sub_index >= 0)
+        )
+        attrs = sub_index[rows, cols]
+        star_keys = np.clip(keys[rows, cols], 0, roll_sum_table.width - 1)
+        rolls[rows, cols] = roll_sum_table.rolls[attrs, star_keys]
+        tier_sums[rows, cols] = roll_sum_table.tier_sums[attrs, star_keys]
+    return rolls, tier_sums
+
+
+def roll_values(table: np.ndarray) -> np.ndarray:
+    """
+    Sub attribute values in highest rolls of their star, as an
+    (artifacts, Max_Sub_Attributes) array.
+    """
+    sub_index = _sub_index[table["sub_attr_ids"]]
+    scale = np.zeros(len(table), dtype=np.float64)
+    for star, star_scale in SubAttributes_Roll_Scale.items():
+        scale[table["star"] == star] = star_scale
+
+    values = np.zeros(sub_index.shape, dtype=np.float64)
+    valid = (sub_index >= 0) & (scale > 0)[:, np.newaxis]
+    values[valid] = table["sub_values"][valid] / (
+        _max_roll[sub_index[valid]]
+        * np.broadcast_to(scale[:, np.newaxis], valid.shape)[valid]
+    )
+    return values
+
+
+def crit_value(table: np.ndarray) -> np.ndarray:
+    """
+    Twice the crit rate plus the crit damage of the sub attributes, in percent.
+    """
+    sub_index = _sub_index[table["sub_attr_ids"]]
+    values = table["sub_values"]
+    crit = 2 * np.where(sub_index == _cr_index, values, 0.0) + np.where(
+        sub_index == _cd_index, values, 0.0
+    )
+    return crit.sum(axis=1) * 100
+
+
+def roll_efficiency(table: np.ndarray) -> np.ndarray:
+    """
+    Mean quality of all rolls, from 0.7 when every roll hit the lowest tier
+    to 1.0 when every roll hit the highest one, 0 without rolls.
+    """
+    rolls = decompose_rolls(table)[0].sum(axis=1)
+    values = roll_values(table).sum(axis=1)
+    return np.divide(values, rolls, out=np.zeros(len(table)), where=rolls > 0)
+
+
+def roll_score(table: np.ndarray, weights: dict[str, float]) -> np.ndarray:
+    """
+    Sum of the sub attribute values in highest rolls weighted by attribute,
+    e.g. `{"cr": 1, "cd": 1, "atkrate": 0.5}`.
+    """
+    weight = np.zeros(len(Subattributes_Id) + 1, dtype=np.float64)
+    for id, w in weights.items():
+        weight[Subattributes_Id.index(id)] = w
+    sub_index = _sub_index[table["sub_attr_ids"]]
+    return (roll_values(table) * weight[sub_index]).sum(axis=1)
+
+
+# scores arrange rules can filter on
+Scores: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "crit_value": crit_value,
+    "roll_value": lambda table: roll_values(table).sum(axis=1),
+    "roll_efficiency": roll_efficiency,
+}
+Score_Ranges = {
+    "crit_value": (0.0, 60.0),
+    "roll_value": (0.0, 9.0),
+    "roll_efficiency": (0.7, 1.0),
+}
@@ -0,0 +1,152 @@
+from array import array
+from itertools import combinations_with_replacement
+
+from base.artifact import (
+    Main_Attributes_Value_By_Level,
+    Max_Level,
+    Percent_Attributes,
+    SubAttributes_Roll_Scale,
+    SubAttributes_Roll_Value,
+)
+
+# Lookup tables of every value an artifact can display.
+#
+# Values are compared by their displayed key, the integer shown in game,
+# a tenth of a percent for percent attributes. Each table is a dense array
+# indexed by key so validating and snapping a value is O(1).
+
+# distance (in keys) a parsed value may be snapped over
+_sub_snap_tolerance = 1
+_main_snap_tolerance = 2
+
+
+def value_key(attr: str, value: float) -> int:
+    if attr in Percent_Attributes:
+        return int(value * 1000 + 0.5)
+    return int(value + 0.5)
+
+
+def key_value(attr: str, key: int) -> float:
+    if attr in Percent_Attributes:
+        return round(key / 1000, 3)
+    return float(key)
+
+
+def max_rolls(star: int, level: int) -> int:
+    """
+    Max rolls of one sub attribute at `level`, the initial roll included.
+    """
+    max_level = Max_Level[star]
+    if level < 0 or level > max_level:
+        level = max_level
+    return 1 + level // 4
+
+
+class SubAttributeTable(object):
+    """
+    Displayable totals of one sub attribute rolled 1 to `rolls` times.
+    """
+
+    def __init__(self, attr: str, star: int, rolls: int) -> None:
+        scale = SubAttributes_Roll_Scale[star]
+        tiers = [v * scale for v in SubAttributes_Roll_Value[attr]]
+
+        size = value_key(attr, tiers[-1] * rolls) + 1
+        self.legal = bytearray(size)
+        for n in range(1, rolls + 1):
+            for combination in combinations_with_replacement(tiers, n):
+                self.legal[value_key(attr, sum(combination))] = 1
+
+        # nearest legal key of every key
+        self.nearest = array("l", [0]) * size
+        last = -1
+        for key in range(size):
+            if self.legal[key]:
+                last = key
+            self.nearest[key] = last
+        last = -1
+        for key in range(size - 1, -1, -1):
+            if self.legal[key]:
+                last = key
+            nearest = self.nearest[key]
+            if nearest < 0 or (last >= 0 and last - key < key - nearest):
+                self.nearest[key] = last
+
+    def snap(self, key: int) -> int:
+        if key < 0:
+            return self.nearest[0]
+        if key >= len(self.nearest):
+            return self.nearest[-1]
+        return self.nearest[key]
+
+
+_sub_tables: dict[tuple[str, int, int], SubAttributeTable] = {}
+
+
+def sub_attribute_table(attr: str, star: int, rolls: int) -> SubAttributeTable:
+    key = (attr, star, rolls)
+    table = _sub_tables.get(key, None)
+    if table is None:
+        table = SubAttributeTable(attr, star, rolls)
+        _sub_tables[key] = table
+    return table
+
+
+def snap_sub_value(attr: str, star: int, level: int, value: float):
+    """
+    Return `(value, valid)`, the value snapped to the nearest total the
+    sub attribute can roll at `level`, invalid if there is none close enough.
+    """
+    if star not in SubAttributes_Roll_Scale or attr not in SubAttributes_Roll_Value:
+        return value, True
+
+    table = sub_attribute_table(attr, star, max_rolls(star, level))
+    key = value_key(attr, value)
+    nearest = table.snap(key)
+    if nearest == key:
+        return value, True
+    if abs(nearest - key) <= _sub_snap_tolerance:
+        return key_value(attr, nearest), True
+    return value, False
+
+
+class MainAttributeTable(object):
+    def __init__(self, attr: str, star: int) -> None:
+        self.keys = [
+            value_key(attr, v) for v in Main_Attributes_Value_By_Level[star][attr]
+        ]
+
+
+_main_tables: dict[tuple[str, int], MainAttributeTable] = {}
+
+
+def main_attribute_table(attr: str, star: int) -> MainAttributeTable:
+    key = (attr, star)
+    table = _main_tables.get(key, None)
+    if table is None:
+        table = MainAttributeTable(attr, star)
+        _main_tables[key] = table
+    return table
+
+
+def snap_main_value(attr: str, star: int, level: int, value: float):
+    """
+    Return `(value, valid)`, the main attribute value is fixed by star and
+    level. The parsed value is always returned as is, it is invalid when it
+    is not close to the expected one: it may belong to another level, the
+    level being the misread field, or the table may be wrong.
+    """
+    if star not in Main_Attributes_Value_By_Level:
+        return value, True
+    if attr not in Main_Attributes_Value_By_Level[star]:
+        return value, True
+    if level < 0 or level > Max_Level[star]:
+        return value, True
+
+    table = main_attribute_table(attr, star)
+    expected = table.keys[level]
+    key = value_key(attr, value)
+    if abs(key - expected) <= _main_snap_tolerance:
+        return value, True
+
+    return value, False
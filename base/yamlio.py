@@ -0,0 +1,35 @@
+"""
+Safe YAML loading and dumping through the libyaml C bindings, falling back
+to the pure Python implementation when PyYAML was built without them.
+"""
+from typing import Any, Callable
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+# pure Python classes also get custom tags, for code using `yaml.safe_load`
+_loaders = {SafeLoader, yaml.SafeLoader}
+_dumpers = {SafeDumper, yaml.SafeDumper}
+
+
+def safe_load(stream) -> Any:
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def safe_dump(data: Any, stream=None, **kwds):
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwds)
+
+
+def add_constructor(tag: str, constructor: Callable):
+    for loader in _loaders:
+        loader.add_constructor(tag, constructor)
+
+
+def add_representer(data_type: type, representer: Callable):
+    for dumper in _dumpers:
+        dumper.add_representer(data_type, representer)
@@ -0,0 +1,135 @@
+"""
+Micro benchmark of the arrange rule engine.
+
+Evaluates the bundled rules `resources/config/arrange/rule_<id>.yaml` over
+random artifact tables of growing size, then variants of them one by one,
+together as a `RuleSet` and together over an `ArtifactIndex`.
+
+usage: python -m benchmark.bench_rule_engine
+"""
+
+import copy
+import glob
+import os
+import random
+import timeit
+
+from arrange.rule_engine import RuleSet, compile_rule, load_rule
+from base import yamlio
+from base.artifact import (
+    Aritifacts_Id,
+    ArtifactRecord,
+    Main_Attributes_Id,
+    Main_Attributes_Value_Range,
+    Positions_Id,
+    Subattributes_Id,
+    SubAttributes_Value_Range,
+)
+from base.artifact_index import ArtifactIndex
+from base.artifact_table import to_table
+
+_rule_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "resources",
+    "config",
+    "arrange",
+)
+
+
+def _random_records(count: int) -> list[ArtifactRecord]:
+    rnd = random.Random(0)
+    records = []
+    for _ in range(count):
+        main_attr = rnd.choice(Main_Attributes_Id)
+        sub_attrs = rnd.sample(Subattributes_Id, rnd.randint(3, 4))
+        records.append(
+            ArtifactRecord.from_dict(
+                {
+                    "name": rnd.choice(Aritifacts_Id),
+                    "pos": rnd.choice(Positions_Id),
+                    "star": rnd.choice((4, 5)),
+                    "level": rnd.randint(0, 20),
+                    "lock": rnd.randint(0, 1),
+                    "main_attr": main_attr,
+                    "main_value": rnd.uniform(*Main_Attributes_Value_Range[main_attr]),
+                    "sub_attrs": sub_attrs,
+                    "sub_values": [
+                        rnd.uniform(*SubAttributes_Value_Range[attr])
+                        for attr in sub_attrs
+                    ],
+                    "equipper": "",
+                }
+            )
+        )
+    return records
+
+
+def _rule_variants(content: dict, count: int) -> list[dict]:
+    """
+    Copies of a rule with other level ranges, the other filters are shared.
+    """
+    rnd = random.Random(0)
+    variants = []
+    for _ in range(count):
+        variant = copy.deepcopy(content)
+        for statement in variant["statements"]:
+            if statement["type"] == "ArtifactLevelStatement":
+                statement["max_level"] = rnd.randint(statement["min_level"], 20)
+        variants.append(variant)
+    return variants
+
+
+def main():
+    for rule_path in glob.glob(os.path.join(_rule_dir, "rule_[0-9]*.yaml")):
+        rule = load_rule(rule_path)
+        for count in (1000, 5000, 20000):
+            table = to_table(_random_records(count))
+            number = 50
+            elapsed = min(
+                timeit.repeat(lambda: rule.match(table), number=number, repeat=5)
+            )
+            print(
+                f"{os.path.basename(rule_path)} artifacts={count:<6} "
+                f"matched={len(rule.match(table)):<6} "
+                f"match={elapsed / number * 1e3:7.3f}ms"
+            )
+
+        with open(rule_path, "r", encoding="utf8") as f:
+            content = yamlio.safe_load(f)
+        for count in (1000, 5000, 20000):
+            table = to_table(_random_records(count))
+            index = ArtifactIndex(table)
+            for rule_count in (5, 20, 50):
+                rules = [compile_rule(c) for c in _rule_variants(content, rule_count)]
+                rule_set = RuleSet(list(range(rule_count)), [""] * rule_count, rules)
+                number = 20
+                separate = min(
+                    timeit.repeat(
+                        lambda: [rule.mask(table) for rule in rules],
+                        number=number,
+                        repeat=10,
+                    )
+                )
+                batch = min(
+                    timeit.repeat(
+                        lambda: rule_set.membership(table), number=number, repeat=10
+                    )
+                )
+                indexed = min(
+                    timeit.repeat(
+                        lambda: rule_set.membership(table, index),
+                        number=number,
+                        repeat=10,
+                    )
+                )
+                print(
+                    f"{os.path.basename(rule_path)} rules={rule_count:<3} "
+                    f"artifacts={count:<6} "
+                    f"separate={separate / number * 1e3:7.3f}ms "
+                    f"batch={batch / number * 1e3:7.3f}ms "
+                    f"indexed={indexed / number * 1e3:7.3f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Import time budget of the launcher.
+
+Imports `main` in a fresh interpreter with `-X importtime`, prints the
+slowest top level imports and fails if the import takes longer than the
+budget or pulls in a module the launcher must not wait for. The windows
+import those once the launcher is shown.
+
+usage: python -m benchmark.bench_startup [budget_ms]
+"""
+import os
+import subprocess
+import sys
+
+_project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_budget_ms = 400.0
+
+# imported by the windows only
+_deferred_modules = (
+    "cv2",
+    "numpy",
+    "onnxruntime",
+    "pyautogui",
+    "win32api",
+    "win32gui",
+    "infer.artifact_warehouse_handler",
+    "arrange.arrange_ui",
+    "export.export_ui",
+)
+
+
+def _import_times(module: str) -> list[tuple[str, int, int]]:
+    """
+    `(name, level, cumulative_us)` of `module` and of everything it imports,
+    level 0 is `module` itself.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_project_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    # one line per module once it is imported, children before their parent
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.rstrip()[1:]
+        level = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), level, int(cumulative_us)))
+
+    end = max(i for i, t in enumerate(times) if t[0] == module and t[1] == 0)
+    start = end
+    while start > 0 and times[start - 1][1] > 0:
+        start -= 1
+    return times[start : end + 1]
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else _budget_ms
+    times = _import_times("main")
+
+    children = [t for t in times if t[1] == 1]
+    children.sort(key=lambda t: t[2], reverse=True)
+    for name, _, cumulative_us in children[:15]:
+        print(f"{name:<40} {cumulative_us / 1e3:8.1f}ms")
+
+    total_ms = times[-1][2] / 1e3
+    print(f"{'total':<40} {total_ms:8.1f}ms, budget {budget_ms:.0f}ms")
+
+    imported = {t[0] for t in times}
+    errors = [
+        f"{name} is imported at startup"
+        for name in _deferred_modules
+        if name in imported
+    ]
+    if total_ms > budget_ms:
+        errors.append(f"import main took {total_ms:.1f}ms, over {budget_ms:.0f}ms")
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Micro benchmark of the stat row parsing of the artifact detail panel.
+
+Compares the former parsing (attribute lookup, then `re.sub` + `re.search`
+for the value and an if/elif chain for the percent variant) with the one
+pass `StatLineTokenizer`, and checks both agree on the corpus.
+
+usage: python -m benchmark.bench_statline
+"""
+import os
+import random
+import re
+import timeit
+
+import yaml
+
+from infer.matcher import AhoCorasickMatcher
+from infer.statline import StatLineTokenizer
+
+_mapper_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "resources",
+    "config",
+    "mapper",
+)
+
+# sub attribute rows as the crnn model returns them, with the usual noise
+_sub_rows = [
+    ("暴击率", ["2.7%", "3.1%", "3.5%", "3.9%", "7.0%", "10.5%"]),
+    ("暴击伤害", ["5.4%", "6.2%", "7.8%", "14.0%", "21.8%"]),
+    ("攻击力", ["14", "16", "19", "33", "54"]),
+    ("攻击力", ["4.1%", "5.8%", "9.9%", "15.2%"]),
+    ("生命值", ["209", "239", "299", "508", "1,195"]),
+    ("生命值", ["4.1%", "4.7%", "9.3%", "14.0%"]),
+    ("防御力", ["16", "19", "23", "39", "62"]),
+    ("防御力", ["5.1%", "7.3%", "13.1%"]),
+    ("元素充能效率", ["4.5%", "5.2%", "6.5%", "11.0%"]),
+    ("元素精通", ["16", "19", "23", "42", "65"]),
+]
+_other_rows = [
+    "角斗士的终幕礼：",
+    "绝缘之旗印：",
+    "2件套：攻击力提高18%。",
+    "",
+]
+
+
+def _build_corpus(size: int) -> list[str]:
+    rnd = random.Random(0)
+    corpus = []
+    for _ in range(size):
+        if rnd.random() < 0.15:
+            corpus.append(rnd.choice(_other_rows))
+            continue
+        name, values = rnd.choice(_sub_rows)
+        prefix = rnd.choice(("·", "・", "", "."))
+        corpus.append(f"{prefix}{name}+{rnd.choice(values)}")
+    return corpus
+
+
+def _legacy_to_float(value: str):
+    value = re.sub("[,，]", "", value)
+    m = re.search(r"\d+\.?\d+%?", value)
+    if m is None:
+        return -1.0
+
+    num_str = m.group()
+    if num_str.find("%") >= 0:
+        num_str = num_str.replace("%", "")
+        return float(num_str) / 100
+    else:
+        return float(num_str)
+
+
+def _legacy_parse(txt: str, matcher: AhoCorasickMatcher):
+    sub_attr = matcher.find(txt)[0]
+    if not sub_attr:
+        return "", -1.0
+    sub_value = _legacy_to_float(txt)
+    if sub_value < 1.0:
+        if sub_attr == "hp":
+            sub_attr = "hprate"
+        elif sub_attr == "atk":
+            sub_attr = "atkrate"
+        elif sub_attr == "def":
+            sub_attr = "defrate"
+    return sub_attr, sub_value
+
+
+def main():
+    with open(
+        os.path.join(_mapper_dir, "artifact_attr_zh.yaml"), "r", encoding="utf8"
+    ) as f:
+        mapper = yaml.safe_load(f)
+    matcher = AhoCorasickMatcher(mapper)
+    tokenizer = StatLineTokenizer(matcher)
+    corpus = _build_corpus(2000)
+
+    mismatches = 0
+    for txt in corpus:
+        legacy = _legacy_parse(txt, matcher)
+        attr, value, _ = tokenizer.tokenize(txt)
+        if attr and legacy != (attr, value):
+            mismatches += 1
+
+    def run_legacy():
+        for txt in corpus:
+            _legacy_parse(txt, matcher)
+
+    def run_tokenizer():
+        for txt in corpus:
+            tokenizer.tokenize(txt)
+
+    number = 20
+    legacy_time = min(timeit.repeat(run_legacy, number=number, repeat=5))
+    tokenizer_time = min(timeit.repeat(run_tokenizer, number=number, repeat=5))
+
+    rows = number * len(corpus)
+    print(
+        f"rows={len(corpus)} mismatches={mismatches} "
+        f"legacy={legacy_time / rows * 1e6:6.2f}us/row "
+        f"tokenizer={tokenizer_time / rows * 1e6:6.2f}us/row "
+        f"speedup={legacy_time / tokenizer_time:5.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro benchmark of the YAML config I/O, pure Python PyYAML against the
+libyaml bindings `base.yamlio` uses when they are available.
+
+Startup loads the strings, the mappers and the det configs. Export and
+arrange write `export.yaml` and rules, rules are read back when selected.
+
+usage: python -m benchmark.bench_yaml
+"""
+import glob
+import io
+import os
+import timeit
+
+import yaml
+
+from base import yamlio
+
+_resources_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "resources",
+)
+
+
+def _read(pattern: str) -> list[str]:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(_resources_dir, pattern))):
+        with open(path, "r", encoding="utf8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def _load_all(texts: list[str], loader):
+    for text in texts:
+        yaml.load(text, Loader=loader)
+
+
+def _dump_all(datas: list, dumper):
+    for data in datas:
+        yaml.dump(data, io.StringIO(), Dumper=dumper, allow_unicode=True)
+
+
+def main():
+    startup = (
+        _read("strings/zh.yaml")
+        + _read("config/mapper/*.yaml")
+        + _read("config/det/*/*.yaml")
+    )
+    rules = _read("config/arrange/rule_[0-9]*.yaml")
+    export_cfg = {
+        "version": 1,
+        "five_star": True,
+        "four_star": True,
+        "level_range": [0, 20],
+        "export_formats": ["mona", "good"],
+    }
+    writes = [export_cfg] + [yaml.safe_load(text) for text in rules]
+
+    print(f"libyaml available: {yamlio.SafeLoader is not yaml.SafeLoader}")
+    cases = [
+        ("startup load", lambda loader, dumper: _load_all(startup, loader)),
+        ("rule load", lambda loader, dumper: _load_all(rules, loader)),
+        ("export/rule dump", lambda loader, dumper: _dump_all(writes, dumper)),
+    ]
+    for name, case in cases:
+        number = 20
+        pure = min(
+            timeit.repeat(
+                lambda: case(yaml.SafeLoader, yaml.SafeDumper),
+                number=number,
+                repeat=3,
+            )
+        )
+        fast = min(
+            timeit.repeat(
+                lambda: case(yamlio.SafeLoader, yamlio.SafeDumper),
+                number=number,
+                repeat=3,
+            )
+        )
+        print(
+            f"{name:<18} pure={pure / number * 1e3:8.3f}ms "
+            f"yamlio={fast / number * 1e3:8.3f}ms x{pure / fast:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Convert saved raw scans, the scan journal (scan.jsonl) or the output of the
+"none" export format, into export formats without starting the Qt app.
+
+usage: python convert.py -f mona -f good -o out_dir scan.jsonl other.json
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from base.journal import read_raw_scan
+from base.mapper import get_mapper_registry
+from infer.encoder import available_encoders, encode_all, get_encoder
+
+_mapper_dir = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources", "config", "mapper"
+)
+
+
+def convert_file(
+    path: str, formats: list[str], output_dir: str
+) -> list[tuple[str, int]]:
+    """
+    Encode the raw scan `path` into every format in one pass,
+    return the path and artifact count of each output.
+    """
+    registry = get_mapper_registry(_mapper_dir)
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    output_paths = []
+    outputs = []
+    try:
+        for format in formats:
+            output_path = os.path.join(output_dir, f"{name}.{format}.json")
+            f = open(output_path, "w", encoding="utf-8")
+            outputs.append((get_encoder(format, registry), f))
+            output_paths.append(output_path)
+        counts = encode_all(read_raw_scan(path), outputs)
+    finally:
+        for _, f in outputs:
+            f.close()
+    return list(zip(output_paths, counts))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formats",
+        action="append",
+        required=True,
+        choices=available_encoders(),
+        help="export format, can be given several times",
+    )
+    parser.add_argument("-o", "--output-dir", default=".")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count(), help="parallel processes"
+    )
+    parser.add_argument("inputs", nargs="+", help="raw scans, .jsonl or .json")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = max(1, min(args.jobs or 1, len(args.inputs)))
+
+    failed = False
+    if jobs == 1:
+        results = []
+        for path in args.inputs:
+            try:
+                results.append(convert_file(path, args.formats, args.output_dir))
+            except Exception as e:
+                results.append(e)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(convert_file, path, args.formats, args.output_dir)
+                for path in args.inputs
+            ]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+
+    for path, result in zip(args.inputs, results):
+        if isinstance(result, Exception):
+            failed = True
+            print(f"{path}: {result}", file=sys.stderr)
+            continue
+        for output_path, count in result:
+            print(f"{path} -> {output_path} ({count} artifacts)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-import json
 import os
 import platform
 import threading
@@ -6,12 +5,17 @@ import time
 import traceback
 from enum import Enum
 
-import yaml
 from PySide6.QtCore import QDir, QObject, Signal, Slot
 
 # import bin.InferPybinder as infer
+from base import yamlio
+from base.journal import Last_Scan_Journal, ScanJournal, read_journal
+from base.mapper import get_mapper_registry
 from infer.artifact_warehouse_handler import ArtifactWarehouseHandler
+from infer.encoder import encode_all, get_encoder
+from tools import perf
 from tools.stringresources import load_string
+from widget import LogOp
 
 
 class ScanState(Enum):
@@ -21,11 +25,6 @@ class ScanState(Enum):
     Error = 3
 
 
-class LogOp(Enum):
-    Append = 0
-    Clear = 1
-
-
 class ExportModel(QObject):
     scan_state = Signal(ScanState)
     progress = Signal(int)
@@ -35,6 +34,10 @@ class ExportModel(QObject):
 
     Export_Format_Mona = "mona"
     Export_Format_YuanMo = "yuanmo"
+    Export_Format_Good = "good"
+
+    # raw artifacts of the last scan, see `ScanJournal`
+    _journal_name = Last_Scan_Journal
 
     def __init__(self):
         super().__init__()
@@ -45,13 +48,15 @@ class ExportModel(QObject):
         self._scan_state = ScanState.Idle
         self._progress = 0
 
-        self._export_format = self.Export_Format_Mona
+        self._export_formats = [self.Export_Format_Mona]
         self._available_export_formats = [
             self.Export_Format_Mona,
             self.Export_Format_YuanMo,
+            self.Export_Format_Good,
         ]
 
         self._close = False
+        self._journal: ScanJournal | None = None
 
         self._cfg_dir = QDir("data:")
         if not self._cfg_dir.exists("./export"):
@@ -67,21 +72,23 @@ class ExportModel(QObject):
                 "five_star": self._five_star,
                 "four_star": self._four_star,
                 "level_range": self._level_range,
-                "export_format": self._export_format,
+                "export_formats": self._export_formats,
             }
 
-            yaml.safe_dump(data, f)
+            yamlio.safe_dump(data, f)
 
     def _load_persist(self):
         if not os.path.exists(self._cfg):
             return
 
         with open(self._cfg, "r", encoding="utf8") as f:
-            data: dict = yaml.safe_load(f)
+            data: dict = yamlio.safe_load(f)
             self._five_star = data.get("five_star", self._five_star)
             self._four_star = data.get("four_star", self._four_star)
             self._level_range = data.get("level_range", self._level_range)
-            self._export_format = data.get("export_format", self._export_format)
+            self._export_formats = data.get("export_formats", None) or [
+                data.get("export_format", self.Export_Format_Mona)
+            ]
 
     def get_five_star(self):
         return self._five_star
@@ -107,11 +114,14 @@ class ExportModel(QObject):
             self._level_range[1] = max
         self._persist()
 
-    def get_export_format(self):
-        return self._export_format
+    def get_export_formats(self):
+        return self._export_formats
 
-    def set_export_format(self, value):
-        self._export_format = value
+    def set_export_format_enabled(self, format: str, enabled: bool):
+        if enabled and format not in self._export_formats:
+            self._export_formats.append(format)
+        elif not enabled and format in self._export_formats:
+            self._export_formats.remove(format)
         self._persist()
 
     def get_available_export_formats(self):
@@ -123,8 +133,88 @@ class ExportModel(QObject):
     def get_progress(self):
         return self._progress
 
+    def _write_outputs(self, journal_path: str) -> list[str]:
+        """
+        Encode the journal into every selected export format in one pass,
+        return the path of each output.
+        """
+        registry = get_mapper_registry(QDir("config:mapper").path())
+        output_paths = []
+        outputs = []
+        try:
+            for format in self._export_formats:
+                output_path = self._cfg_dir.absoluteFilePath(f"{format}.json")
+                f = open(output_path, "w", encoding="utf-8")
+                outputs.append((get_encoder(format, registry), f))
+                output_paths.append(output_path)
+            encode_all(read_journal(journal_path), outputs)
+        finally:
+            for _, f in outputs:
+                f.close()
+        return output_paths
+
+    def export_last_scan(self):
+        """
+        Export the journal of the last scan again, e.g. into other formats.
+        """
+        if self._scan_state is ScanState.Running:
+            return
+
+        self.log.emit(LogOp.Clear, "")
+        journal_path = self._cfg_dir.absoluteFilePath(self._journal_name)
+        if not os.path.exists(journal_path):
+            self.log.emit(
+                LogOp.Append,
+                time.strftime("%H:%M:%S ") + load_string("error_no_last_scan"),
+            )
+            return
+        if not self._export_formats:
+            self.log.emit(
+                LogOp.Append,
+                time.strftime("%H:%M:%S ")
+                + load_string("error_tip_none_selected_format"),
+            )
+            return
+
+        self._scan_state = ScanState.Running
+        self.scan_state.emit(self._scan_state)
+        self.t = threading.Thread(target=self._export, args=(journal_path,))
+        self.t.start()
+
+    def _export(self, journal_path: str):
+        try:
+            output_paths = self._write_outputs(journal_path)
+        except Exception as e:
+            self.log.emit(
+                LogOp.Append,
+                time.strftime("%H:%M:%S ")
+                + load_string("error_log_prefix").format(str(e)),
+            )
+            traceback.print_exc()
+            self._scan_state = ScanState.Error
+            self.scan_state.emit(self._scan_state)
+            return
+
+        self._scan_state = ScanState.Finished
+        self.scan_state.emit(self._scan_state)
+        for output_path in output_paths:
+            self.dialog_save_output.emit(output_path)
+
+    def _end_journal(self) -> list[str]:
+        """
+        Write the outputs of the scan, its journal becomes the last scan
+        if it has any artifact.
+        """
+        self._journal.close()
+        output_paths = self._write_outputs(self._journal.temp_path)
+        if self._journal.count > 0:
+            self._journal.commit()
+        return output_paths
+
     def _scan_callback(self, code: int, **argws):
-        if code == ArtifactWarehouseHandler.CB_INFO_PROGRAM:
+        if code == ArtifactWarehouseHandler.CB_INFO_ARTIFACT:
+            self._journal.append(argws["artifact"])
+        elif code == ArtifactWarehouseHandler.CB_INFO_PROGRAM:
             self._progress = argws["program"]
             self.progress.emit(self._progress)
         if code == ArtifactWarehouseHandler.CB_INFO_ARTIFACTS_COUNT:
@@ -141,35 +231,19 @@ class ExportModel(QObject):
                 + f"\n{argws['artifact']}",
             )
         elif code == ArtifactWarehouseHandler.CB_INFO_FINISH:
-            output_path = self._cfg_dir.absoluteFilePath("output.json")
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(
-                    argws["artifacts"],
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    separators=(",", ": "),
-                )
+            output_paths = self._end_journal()
             self.log.emit(
                 LogOp.Append,
-                time.strftime("%H:%M:%S ")
-                + load_string("scan_finished"),
+                time.strftime("%H:%M:%S ") + load_string("scan_finished"),
             )
             self._progress = 100
             self.progress.emit(self._progress)
             self._scan_state = ScanState.Finished
             self.scan_state.emit(self._scan_state)
-            self.dialog_save_output.emit(output_path)
+            for output_path in output_paths:
+                self.dialog_save_output.emit(output_path)
         elif code == ArtifactWarehouseHandler.CB_ERR_INTERRUPT_BY_USER:
-            output_path = self._cfg_dir.absoluteFilePath("output.json")
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(
-                    argws["artifacts"],
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    separators=(",", ": "),
-                )
+            output_paths = self._end_journal()
             self.log.emit(
                 LogOp.Append,
                 time.strftime("%H:%M:%S ")
@@ -177,7 +251,8 @@ class ExportModel(QObject):
             )
             self._scan_state = ScanState.Error
             self.scan_state.emit(self._scan_state)
-            self.dialog_save_output.emit(output_path)
+            for output_path in output_paths:
+                self.dialog_save_output.emit(output_path)
         elif code == ArtifactWarehouseHandler.CB_ERR_SWITCH_FAILED:
             self.log.emit(
                 LogOp.Append,
@@ -212,22 +287,34 @@ class ExportModel(QObject):
             res_root += os.path.sep
 
             awh = ArtifactWarehouseHandler()
-            format = "none"
-            if self._export_format == self.Export_Format_Mona:
-                format = "mona"
-            elif self._export_format == self.Export_Format_YuanMo:
-                format = "yuanmo"
+
+            if perf.env_enabled():
+                perf.enable()
+            if perf.env_trace_enabled():
+                perf.enable_trace()
 
             self._progress = 0
             self.progress.emit(self._progress)
-            awh.scan_artifacts(
-                min_star=min_star,
-                max_star=max_star,
-                min_level=min_level,
-                max_level=max_level,
-                format=format,
-                callback=self._scan_callback,
-            )
+            journal_path = self._cfg_dir.absoluteFilePath(self._journal_name)
+            self._journal = ScanJournal(journal_path)
+            try:
+                awh.scan_artifacts(
+                    min_star=min_star,
+                    max_star=max_star,
+                    min_level=min_level,
+                    max_level=max_level,
+                    callback=self._scan_callback,
+                )
+            finally:
+                # not committed if the scan failed, the last scan is kept
+                self._journal.discard()
+
+            if perf.is_enabled():
+                perf.dump(self._cfg_dir.absoluteFilePath("perf.json"))
+                perf.disable()
+            if perf.is_trace_enabled():
+                perf.flush_trace(self._cfg_dir.absoluteFilePath("trace.json"))
+                perf.disable_trace()
         except Exception as e:
             self.log.emit(
                 LogOp.Append,
@@ -261,6 +348,14 @@ class ExportModel(QObject):
             )
             return
 
+        if not self._export_formats:
+            self.log.emit(
+                LogOp.Append,
+                time.strftime("%H:%M:%S ")
+                + load_string("error_tip_none_selected_format"),
+            )
+            return
+
         if (
             self._level_range[0] > self._level_range[1]
             or self._level_range[0] < 0
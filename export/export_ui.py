@@ -1,6 +1,6 @@
 import shutil
 
-from PySide6.QtCore import QDir, QEvent, QFile, Qt, QTextStream, Slot
+from PySide6.QtCore import QDir, QEvent, QFile, QFileInfo, Qt, QTextStream, Slot
 from PySide6.QtGui import (
     QCloseEvent,
     QDoubleValidator,
@@ -17,7 +17,6 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
-    QRadioButton,
     QSizePolicy,
     QVBoxLayout,
     QWidget,
@@ -25,9 +24,9 @@ from PySide6.QtWidgets import (
 from typing_extensions import override
 
 from tools.stringresources import load_string
-from widget import LogView, Ranger
+from widget import LogOp, LogView, Ranger
 
-from .export_model import ExportModel, LogOp, ScanState
+from .export_model import ExportModel, ScanState
 
 
 class ExportUi(QWidget):
@@ -83,21 +82,21 @@ class ExportUi(QWidget):
         self._export_layout = QHBoxLayout()
         self._export_layout.addWidget(self._export_format_title)
 
-        self._export_group_radio = QButtonGroup()
-        export_format_id = self._model.get_export_format()
+        # several formats can be exported from one scan
+        self._export_group = QButtonGroup()
+        self._export_group.setExclusive(False)
+        export_format_ids = self._model.get_export_formats()
         for format_id in self._model.get_available_export_formats():
-            format_btn = QRadioButton(load_string(format_id))
+            format_btn = QCheckBox(load_string(format_id))
             format_btn.setObjectName(format_id)
 
-            if format_id == export_format_id:
+            if format_id in export_format_ids:
                 format_btn.setChecked(True)
 
-            self._export_group_radio.addButton(format_btn)
+            self._export_group.addButton(format_btn)
             self._export_layout.addWidget(format_btn)
 
-        self._export_group_radio.buttonToggled.connect(
-            self._notify_export_format_changed
-        )
+        self._export_group.buttonToggled.connect(self._notify_export_format_changed)
 
         self._export_layout.addStretch()
 
@@ -107,6 +106,13 @@ class ExportUi(QWidget):
             QSizePolicy.Policy.Fixed,
         )
         self._scan_btn.clicked.connect(self._notify_start_scan)
+
+        self._export_last_scan_btn = QPushButton(load_string("export_last_scan"))
+        self._export_last_scan_btn.setSizePolicy(
+            QSizePolicy.Policy.Expanding,
+            QSizePolicy.Policy.Fixed,
+        )
+        self._export_last_scan_btn.clicked.connect(self._notify_export_last_scan)
         self._model.scan_state.connect(self._event_scan_state_changed)
         self._model.progress.connect(self._event_scan_progress_changed)
 
@@ -119,6 +125,7 @@ class ExportUi(QWidget):
         self._root_layout.addWidget(self._level_range)
         self._root_layout.addLayout(self._export_layout)
         self._root_layout.addWidget(self._scan_btn)
+        self._root_layout.addWidget(self._export_last_scan_btn)
         self._root_layout.addWidget(self._log_view, stretch=1)
 
         self.setLayout(self._root_layout)
@@ -131,7 +138,7 @@ class ExportUi(QWidget):
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             load_string("save_artifact_export"),
-            self._model.get_export_format(),
+            QFileInfo(path).fileName(),
             load_string("export_artifact_fitler"),
         )
         if file_path:
@@ -178,13 +185,16 @@ class ExportUi(QWidget):
             self._level_range.set_range(max=str(max_level))
 
     def _notify_export_format_changed(self, button: QAbstractButton, toggled):
-        if toggled == True:
-            self._model.set_export_format(button.objectName())
+        self._model.set_export_format_enabled(button.objectName(), toggled)
 
     @Slot()
     def _notify_start_scan(self):
         self._model.start_scan()
 
+    @Slot()
+    def _notify_export_last_scan(self):
+        self._model.export_last_scan()
+
     @Slot(ScanState)
     def _event_scan_state_changed(self, state: ScanState):
         if state is ScanState.Idle:
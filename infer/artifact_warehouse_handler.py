@@ -1,181 +1,30 @@
 import ctypes
-import os
 import re
 import time
-from typing import Callable, Final, Literal, Optional
+from typing import Callable, Final, Optional
 
 import cv2
-import numpy as np
 import pyautogui
-import yaml
 from PySide6.QtCore import QDir
 
+from base import rolltable
+from base.artifact import ArtifactRecord
+from base.mapper import get_mapper_registry
 from infer import wm
+from infer.det_layout import get_layout_index
+from infer.lock_plan import plan_lock_pages
+from infer.matcher import AhoCorasickMatcher, FuzzyMatcher
 from infer.rec import TextRecInfer
+from infer.statline import StatLineTokenizer, parse_int, parse_stat
+from tools import perf
 
-
-def _encode_artifacts_yuanmo(artifacts: list):
-    mapper_fold = QDir("config:mapper").path()
-    artifact_name_mapper: dict = {}
-    artifact_attr_mapper: dict = {}
-    artifact_pos_mapper: dict = {}
-    with open(
-        os.path.join(mapper_fold, "artifact_attr_yuanmo.yaml"),
-        "r",
-        encoding="utf8",
-    ) as f:
-        artifact_attr_mapper = yaml.safe_load(f)
-    with open(
-        os.path.join(mapper_fold, "artifact_name_yuanmo.yaml"),
-        "r",
-        encoding="utf8",
-    ) as f:
-        artifact_name_mapper = yaml.safe_load(f)
-
-    with open(
-        os.path.join(mapper_fold, "artifact_pos_yuanmo.yaml"),
-        "r",
-        encoding="utf8",
-    ) as f:
-        artifact_pos_mapper = yaml.safe_load(f)
-
-    output = []
-    for artifact in artifacts:
-        name = artifact["name"].strip()
-        name = artifact_name_mapper.get(name, None)
-        if name is None:
-            continue
-
-        pos = artifact_pos_mapper.get(artifact["pos"], None)
-        if pos is None:
-            continue
-
-        main_attr = artifact_attr_mapper.get(artifact["main_attr"], None)
-        if main_attr is None:
-            continue
-
-        main_value = artifact["main_value"]
-        if main_value == 0:
-            continue
-
-        star = artifact["star"]
-        if star < 4:
-            continue
-
-        level = artifact["level"]
-        if level < 0 or level > 20:
-            continue
-
-        sub_attrs = [
-            artifact_attr_mapper[sub_attr] for sub_attr in artifact["sub_attrs"]
-        ]
-        sub_values = artifact.sub_values
-
-        o = {
-            "asKey": name,
-            "rarity": star,
-            "slot": pos,
-            "level": level,
-            "mainStat": main_attr,
-            "subStat1Type": "critRate",
-            "mark": "none",
-        }
-        for i in range(1, 5):
-            if i < len(sub_attrs):
-                o[f"subStat{i}Type"] = sub_attrs[i - 1]
-                o[f"subStat{i}Value"] = sub_values[i - 1]
-            else:
-                o[f"subStat{i}Type"] = "critDamage"
-                o[f"subStat{i}Value"] = 0
-
-        output.append(o)
-
-    return output
-
-
-def _encode_artifacts_mona(artifacts: list):
-    mapper_fold = QDir("config:mapper").path()
-
-    artifact_name_mapper: dict = {}
-    artifact_attr_mapper: dict = {}
-    artifact_pos_mapper: dict = {}
-    with open(
-        os.path.join(mapper_fold, "artifact_attr_mona.yaml"),
-        "r",
-        encoding="utf8",
-    ) as f:
-        artifact_attr_mapper = yaml.safe_load(f)
-    with open(
-        os.path.join(mapper_fold, "artifact_name_mona.yaml"),
-        "r",
-        encoding="utf8",
-    ) as f:
-        artifact_name_mapper = yaml.safe_load(f)
-
-    with open(
-        os.path.join(mapper_fold, "artifact_pos_mona.yaml"),
-        "r",
-        encoding="utf8",
-    ) as f:
-        artifact_pos_mapper = yaml.safe_load(f)
-
-    output = {
-        "version": 1,
-        "flower": [],
-        "feather": [],
-        "sand": [],
-        "cup": [],
-        "head": [],
-    }
-    for artifact in artifacts:
-        name = artifact["name"].strip()
-        name = artifact_name_mapper.get(name, None)
-        if name is None:
-            continue
-
-        pos = artifact_pos_mapper.get(artifact["pos"], None)
-        if pos is None:
-            continue
-
-        main_attr = artifact_attr_mapper.get(artifact["main_attr"], None)
-        if main_attr is None:
-            continue
-
-        main_value = artifact["main_value"]
-        if main_value == 0:
-            continue
-
-        star = artifact["star"]
-        if star < 4:
-            continue
-
-        level = artifact["level"]
-        if level < 0 or level > 20:
-            continue
-
-        sub_attrs = [
-            artifact_attr_mapper[sub_attr] for sub_attr in artifact["sub_attrs"]
-        ]
-        sub_values = artifact["sub_values"]
-
-        new_artifact = {
-            "setName": name,
-            "position": pos,
-            "mainTag": {"name": main_attr, "value": main_value},
-            "normalTags": [
-                {"name": sub_attr, "value": sub_value}
-                for sub_attr, sub_value in zip(sub_attrs, sub_values)
-            ],
-            "omit": False,
-            "level": level,
-            "star": star,
-            "equip": artifact["equipper"],
-        }
-        output[pos].append(new_artifact)
-    return output
+_equipper_pattern = re.compile(r"(.*)已装备")
 
 
 class ArtifactWarehouseHandler(object):
+    CB_WARN_LOCK_UNPLACED: Final[int] = -9
+    CB_ERR_LOCK_MISMATCH: Final[int] = -8
+    CB_WARN_LOCK_FAILED: Final[int] = -7
     CB_ERR_INTERRUPT_BY_USER: Final[int] = -6
     CB_ERR_CANNOT_FIND_DET_CONFIG: Final[int] = -5
     CB_ERR_PARAM_INVALID: Final[int] = -4
@@ -185,20 +34,36 @@ class ArtifactWarehouseHandler(object):
     CB_INFO_FINISH: Final[int] = 0
     CB_INFO_PROGRAM: Final[int] = 1
     CB_INFO_ARTIFACTS_COUNT: Final[int] = 2
+    CB_INFO_ARTIFACT: Final[int] = 3
 
     def __init__(self) -> None:
         self._detconfig_path = QDir("config:det/artifact_warehouse").path()
 
-        map_fold = QDir("config:mapper")
-        map_pos_zh_path = map_fold.filePath("artifact_pos_zh.yaml")
-        with open(map_pos_zh_path, "r", encoding="utf-8") as f:
-            self._map_pos_zh = yaml.safe_load(f)
-        map_name_zh_path = map_fold.filePath("artifact_name_zh.yaml")
-        with open(map_name_zh_path, "r", encoding="utf-8") as f:
-            self._map_name_zh = yaml.safe_load(f)
-        map_attr_zh_path = map_fold.filePath("artifact_attr_zh.yaml")
-        with open(map_attr_zh_path, "r", encoding="utf-8") as f:
-            self._map_attr_zh = yaml.safe_load(f)
+        registry = get_mapper_registry(QDir("config:mapper").path())
+        self._map_pos_zh = registry.get("artifact_pos_zh.yaml")
+        self._map_name_zh = registry.get("artifact_name_zh.yaml")
+        self._map_attr_zh = registry.get("artifact_attr_zh.yaml")
+
+        self._pos_matcher = registry.derived("artifact_pos_zh.yaml", AhoCorasickMatcher)
+        self._name_matcher = registry.derived(
+            "artifact_name_zh.yaml", AhoCorasickMatcher
+        )
+        self._attr_matcher = registry.derived(
+            "artifact_attr_zh.yaml", AhoCorasickMatcher
+        )
+
+        # fallback matchers for rows with OCR errors
+        confusion = "ocr_confusion_zh.yaml"
+        self._pos_fuzzy_matcher = registry.derived(
+            "artifact_pos_zh.yaml", FuzzyMatcher, confusion
+        )
+        self._name_fuzzy_matcher = registry.derived(
+            "artifact_name_zh.yaml", FuzzyMatcher, confusion
+        )
+        self._attr_fuzzy_matcher = registry.derived(
+            "artifact_attr_zh.yaml", FuzzyMatcher, confusion
+        )
+        self._statline = StatLineTokenizer(self._attr_matcher, self._attr_fuzzy_matcher)
 
         self._infer = TextRecInfer()
 
@@ -214,139 +79,38 @@ class ArtifactWarehouseHandler(object):
             return -1
         return level
 
-    def _to_float(self, value: str):
-        value = re.sub("[,，]", "", value)
-        m = re.search(r"\d+\.?\d+%?", value)
-        if m is None:
-            return -1.0
-
-        num_str = m.group()
-        if num_str.find("%") >= 0:
-            num_str = num_str.replace("%", "")
-            return float(num_str) / 100
-        else:
-            return float(num_str)
-
     def _to_int(self, value: str):
-        value = re.sub("[,，.]", "", value)
-        m = re.search(r"\d+", value)
-        if m is None:
-            return -1
-        return int(m.group())
+        return parse_int(value)
 
-    def _find_in_map(self, key: str, map: dict[str, str]):
-        for k, v in map.items():
-            if key.find(v) >= 0:
-                return k
-
-        return ""
+    def _to_lock(self, lock_str: str):
+        if lock_str.find("开的锁") >= 0:
+            return 0
+        elif lock_str.find("关的锁") >= 0:
+            return 1
+        return -1
 
     def _detect_det_config(self, win_width, win_height):
-        sch_ratio = win_width / win_height
-        for det_name in os.listdir(self._detconfig_path):
-            det_path = os.path.join(self._detconfig_path, det_name)
-            with open(det_path, "r", encoding="utf8") as f:
-                det_config = yaml.safe_load(f)
-
-            det_width = det_config["resolution"]["width"]
-            det_height = det_config["resolution"]["height"]
-            if det_width == win_width and det_height == win_height:
-                break
-
-            det_ratio = det_width / det_height
-            if abs((det_ratio - sch_ratio) / sch_ratio) < 0.01:
-                break
-        else:
+        layout = get_layout_index(self._detconfig_path).lookup(win_width, win_height)
+        if layout is None:
             return False
 
-        scale = win_width / det_width
-        count_bound = np.array(det_config["count"], dtype=np.float64)
-        count_bound *= scale
-        count_bound = np.round(count_bound).astype(np.int32)
-        count_bound = np.expand_dims(count_bound, axis=0)
-        self._count_bound = count_bound
-
-        info_bounds = []
-        info_bounds.append(np.array(det_config["pos"], dtype=np.float64))  # 0
-        info_bounds.append(np.array(det_config["level"], dtype=np.float64))  # 1
-        info_bounds.append(np.array(det_config["main_attr"], dtype=np.float64))  # 2
-        info_bounds.append(np.array(det_config["main_value"], dtype=np.float64))  # 3
-        info_bounds.append(np.array(det_config["star"], dtype=np.float64))  # 4
-        info_bounds.append(np.array(det_config["lock"], dtype=np.float64))  # 5
-        info_bounds.append(np.array(det_config["equipper"], dtype=np.float64))  # 6
-        txt_row = det_config["txt"]["row"]
-        txt_height = det_config["txt"]["txt_height"]
-        txt_bound = det_config["txt"]["bound"]
-        txt_intervalh = (txt_bound[3] - txt_bound[1] - txt_height * txt_row) / (
-            txt_row - 1
-        )
-        for i in range(txt_row):
-            l = txt_bound[0]
-            t = txt_bound[1] + i * (txt_height + txt_intervalh)
-            r = txt_bound[2]
-            b = t + txt_height
-            info_bounds.append(
-                np.array(
-                    (l, t, r, b),
-                    dtype=np.float64,
-                )
-            )
-        info_bounds = np.array(info_bounds, dtype=np.float64)
-        info_bounds *= scale
-        info_bounds = np.round(info_bounds).astype(np.int32)
-        self._info_bounds = info_bounds
-
-        list_row = det_config["list"]["row"]
-        list_col = det_config["list"]["col"]
-        list_bound = np.array(det_config["list"]["bound"], dtype="float")
-        list_bound *= scale
-        list_bound = np.round(list_bound).astype(np.int32)
-        list_width = list_bound[2] - list_bound[0]
-        list_height = list_bound[3] - list_bound[1]
-        card_width = det_config["list"]["card"]["width"]
-        card_width *= scale
-        card_width = int(round(card_width))
-        card_height = det_config["list"]["card"]["height"]
-        card_height *= scale
-        card_height = int(round(card_height))
-        card_intervalx = int((list_width - card_width * list_col) / (list_col - 1))
-        card_intervaly = int((list_height - card_height * list_row) / (list_row - 1))
-        self._list_row = list_row
-        self._list_col = list_col
-        self._list_bound = list_bound
-        self._list_width = list_width
-        self._list_height = list_height
-        self._card_width = card_width
-        self._card_height = card_height
-        self._card_intervalx = card_intervalx
-        self._card_intervaly = card_intervaly
+        self._layout = layout
+        self._count_bound = layout.count_bound
+        self._info_bounds = layout.info_bounds
+        self._list_row = layout.list_row
+        self._list_col = layout.list_col
+        self._list_bound = layout.list_bound
+        self._card_width = layout.card_width
+        self._card_intervaly = layout.card_intervaly
 
         return True
 
-    def scan_artifacts(
-        self,
-        min_star: int,
-        max_star: int,
-        min_level: int,
-        max_level: int,
-        format: Literal["none", "mona", "yuanmo"],
-        callback: Callable[..., None],
-    ):
-        if (
-            min_star > max_star
-            or min_level > max_level
-            or min_star < 0
-            or min_star > 5
-            or max_star < 0
-            or max_star > 5
-            or min_level < 0
-            or min_level > 20
-            or max_level < 0
-            or max_level > 20
-        ):
-            callback(code=ArtifactWarehouseHandler.CB_ERR_PARAM_INVALID)
-            return
-
+    def _attach_warehouse(self, callback: Callable[..., None]):
+        """
+        Switch to the game and read the artifact count of the warehouse,
+        return `(hwnd, screenshot handler, screenshot, count)` or None
+        after reporting the failure.
+        """
         token = ctypes.windll.shell32.IsUserAnAdmin()
         if token != 0:
             is_admin = True
@@ -355,12 +119,12 @@ class ArtifactWarehouseHandler(object):
 
         if not is_admin:
             callback(code=ArtifactWarehouseHandler.CB_ERR_SWITCH_FAILED)
-            return
+            return None
 
         hwnd = wm.switch_to_genshin()
         if hwnd == 0:
             callback(code=ArtifactWarehouseHandler.CB_ERR_SWITCH_FAILED)
-            return
+            return None
 
         sch = wm.ScreenshootHandler(hwnd)
         sch_height = sch.height
@@ -368,18 +132,51 @@ class ArtifactWarehouseHandler(object):
 
         if self._detect_det_config(sch_width, sch_height) is False:
             callback(code=ArtifactWarehouseHandler.CB_ERR_CANNOT_FIND_DET_CONFIG)
-            return
+            return None
 
         img = sch.take()
-        (count,) = self._infer.predict(img, self._count_bound)
+        (count,) = self._infer.predict(
+            img, self._count_bound, self._layout.count_field_types
+        )
         count = self._to_int(count)
         if count == -1:
             callback(code=ArtifactWarehouseHandler.CB_ERR_FIND_ARTIFACT_COUNT_FAILED)
-            return
+            return None
         else:
             callback(code=ArtifactWarehouseHandler.CB_INFO_ARTIFACTS_COUNT, count=count)
 
+        return hwnd, sch, img, count
+
+    def scan_artifacts(
+        self,
+        min_star: int,
+        max_star: int,
+        min_level: int,
+        max_level: int,
+        callback: Callable[..., None],
+    ):
+        if (
+            min_star > max_star
+            or min_level > max_level
+            or min_star < 0
+            or min_star > 5
+            or max_star < 0
+            or max_star > 5
+            or min_level < 0
+            or min_level > 20
+            or max_level < 0
+            or max_level > 20
+        ):
+            callback(code=ArtifactWarehouseHandler.CB_ERR_PARAM_INVALID)
+            return
+
+        attached = self._attach_warehouse(callback)
+        if attached is None:
+            return
+        hwnd, sch, img, count = attached
+
         winx, winy, _, _ = wm.get_client_frame(hwnd)
+        card_clicks = self._layout.card_clicks(winx, winy)
 
         # start scan
         # state diagram
@@ -400,10 +197,32 @@ class ArtifactWarehouseHandler(object):
         action_end_by_user = 601
 
         action = action_begin
+        state_timer = perf.state_timer(
+            "scan",
+            {
+                action_begin: "begin",
+                action_check_page_skippable: "check_page_skippable",
+                action_itr_start: "itr_start",
+                action_itr_click_next: "itr_click_next",
+                action_itr_rec: "itr_rec",
+                action_itr_capture_screenshoot: "itr_capture_screenshoot",
+                action_scroll_cards: "scroll_cards",
+                action_scroll_next_page: "scroll_next_page",
+                action_end_by_ending: "end_by_ending",
+                action_end_by_user: "end_by_user",
+            },
+        )
 
         itr_rowi = 0
         itr_coli = 0
-        artifacts = []
+        # list row shown in the first grid row and grid cell of the
+        # screenshot being recognized, to locate artifacts in the list
+        row_offset = 0
+        rec_rowi = 0
+        rec_coli = 0
+        last_top_row = max(
+            (count + self._list_col - 1) // self._list_col - self._list_row, 0
+        )
 
         mouse_x = 0
         mouse_y = 0
@@ -412,18 +231,11 @@ class ArtifactWarehouseHandler(object):
         scroll_to_end = False
         scroll_distances_of_list = 0
         scroll_card_num = 0
-        scroll_anchor_l = self._list_bound[0]
-        scroll_anchor_t = self._list_bound[1] - self._card_intervaly
-        scroll_anchor_r = int(scroll_anchor_l + self._card_width * 0.3)
-        scroll_anchor_b = int(scroll_anchor_t + self._card_intervaly * 0.5)
-        scroll_anchor_img = img[
-            scroll_anchor_t:scroll_anchor_b,
-            scroll_anchor_l:scroll_anchor_r,
-            :,
-        ]
+        scroll_anchor_img = self._crop_scroll_anchor(img)
 
         while True:
             # print("awh.scan_artifact action: ", action)
+            state_timer.switch(action)
 
             if action == action_begin:
                 posx = self._info_bounds[0, 0] + winx
@@ -432,15 +244,17 @@ class ArtifactWarehouseHandler(object):
 
                 for _ in range(3):
                     pyautogui.scroll(clicks=1)
+                row_offset = 0
 
                 action = action_check_page_skippable
 
             elif action == action_check_page_skippable:
-                first_x = self._list_bound[0] + winx + self._card_width // 2
-                first_y = self._list_bound[1] + winy + self._card_height // 2
+                first_x, first_y = card_clicks[0][0]
 
-                pyautogui.click(first_x, first_y)
-                time.sleep(0.05)
+                with perf.stage("scan.click"):
+                    pyautogui.click(first_x, first_y)
+                with perf.stage("scan.sleep"):
+                    time.sleep(0.05)
                 img = sch.take()
                 first_info = self._fetch_artifact_info(img)[0]
 
@@ -451,11 +265,12 @@ class ArtifactWarehouseHandler(object):
                 first_star_level = first_info["star"] * 100 + first_info["level"]
 
                 if not scroll_to_end:
-                    last_x = self._list_bound[2] + winx - self._card_width // 2
-                    last_y = self._list_bound[3] + winy - self._card_height // 2
+                    last_x, last_y = card_clicks[-1][-1]
 
-                    pyautogui.click(last_x, last_y)
-                    time.sleep(0.05)
+                    with perf.stage("scan.click"):
+                        pyautogui.click(last_x, last_y)
+                    with perf.stage("scan.sleep"):
+                        time.sleep(0.05)
                     img = sch.take()
                     last_info = self._fetch_artifact_info(img)[0]
 
@@ -509,6 +324,10 @@ class ArtifactWarehouseHandler(object):
                     for _ in range(scroll_distances):
                         pyautogui.scroll(1 if scroll_card_num > 0 else -1, _pause=False)
                         time.sleep(0.01)
+                    if scroll_card_num > 0:
+                        row_offset -= scroll_card_num - 1
+                    else:
+                        row_offset -= scroll_card_num + 1
                     scroll_card_num = 1 if scroll_card_num > 0 else -1
 
                 is_interval = True
@@ -535,11 +354,7 @@ class ArtifactWarehouseHandler(object):
                             break
 
                     before_img = img
-                    anchor_img = img[
-                        scroll_anchor_t:scroll_anchor_b,
-                        scroll_anchor_l:scroll_anchor_r,
-                        :,
-                    ]
+                    anchor_img = self._crop_scroll_anchor(img)
                     confidence = cv2.matchTemplate(
                         anchor_img,
                         scroll_anchor_img,
@@ -551,8 +366,10 @@ class ArtifactWarehouseHandler(object):
                         if not is_interval:
                             if scroll_card_num > 0:
                                 scroll_card_num -= 1
+                                row_offset -= 1
                             else:
                                 scroll_card_num += 1
+                                row_offset += 1
                             is_interval = True
                     else:
                         if is_interval:
@@ -583,6 +400,9 @@ class ArtifactWarehouseHandler(object):
                         scroll_to_top = True
                         action = action_end_by_ending
                     else:
+                        # the list stops past the last row, the grid is
+                        # aligned again one row up at the last full page
+                        row_offset = last_top_row + 1
                         scroll_card_num = 1
                         scroll_to_end = True
                         action = action_scroll_cards
@@ -608,30 +428,23 @@ class ArtifactWarehouseHandler(object):
                     action = action_scroll_next_page
                     continue
 
-                x = (
-                    self._list_bound[0]
-                    + itr_coli * (self._card_intervalx + self._card_width)
-                    + winx
-                    + self._card_width // 2
-                )
-                y = (
-                    self._list_bound[1]
-                    + itr_rowi * (self._card_intervaly + self._card_height)
-                    + winy
-                    + self._card_height // 2
-                )
+                x, y = card_clicks[itr_rowi][itr_coli]
 
-                pyautogui.click(x, y, _pause=False)
+                with perf.stage("scan.click"):
+                    pyautogui.click(x, y, _pause=False)
                 mouse_x = x
                 mouse_y = y
 
                 if itr_coli == 0 and itr_rowi == 0:
-                    time.sleep(0.1)
+                    with perf.stage("scan.sleep"):
+                        time.sleep(0.1)
                     action = action_itr_capture_screenshoot
                 else:
                     action = action_itr_rec
             elif action == action_itr_capture_screenshoot:
                 img = sch.take()
+                rec_rowi = itr_rowi
+                rec_coli = itr_coli
                 if itr_coli == self._list_col - 1 and itr_rowi == self._list_row - 1:
                     action = action_itr_rec
                 else:
@@ -647,6 +460,7 @@ class ArtifactWarehouseHandler(object):
                     or artifact["pos"] == ""
                     or artifact["main_attr"] == ""
                     or artifact["main_value"] < 0
+                    or any(v < 0 for v in artifact["sub_values"])
                 ):
                     callback(
                         code=ArtifactWarehouseHandler.CB_WARN_RECGNIZE_FAILED,
@@ -661,7 +475,14 @@ class ArtifactWarehouseHandler(object):
                         and level >= min_level
                         and level <= max_level
                     ):
-                        artifacts.append(artifact)
+                        record = ArtifactRecord.from_dict(artifact)
+                        record.index = (
+                            row_offset + rec_rowi
+                        ) * self._list_col + rec_coli
+                        callback(
+                            code=ArtifactWarehouseHandler.CB_INFO_ARTIFACT,
+                            artifact=record,
+                        )
                     if star <= min_star and level < min_level or star < min_star:
                         end = True
 
@@ -680,55 +501,268 @@ class ArtifactWarehouseHandler(object):
                     action = action_itr_capture_screenshoot
 
             elif action == action_end_by_ending:
-                artifacts = self._encode_artifacts(artifacts, format)
-                callback(
-                    code=ArtifactWarehouseHandler.CB_INFO_FINISH, artifacts=artifacts
-                )
+                callback(code=ArtifactWarehouseHandler.CB_INFO_FINISH)
                 break
             elif action == action_end_by_user:
-                artifacts = self._encode_artifacts(artifacts, format)
-                callback(
-                    code=ArtifactWarehouseHandler.CB_ERR_INTERRUPT_BY_USER,
-                    artifacts=artifacts,
-                )
+                callback(code=ArtifactWarehouseHandler.CB_ERR_INTERRUPT_BY_USER)
                 break
 
-    def _encode_artifacts(
-        self, artifacts: list, format: Literal["mona", "yuanmo", "none"]
+        state_timer.stop()
+
+    def lock_artifacts(
+        self,
+        artifacts: list[ArtifactRecord],
+        lock: int,
+        callback: Callable[..., None],
     ):
-        match format:
-            case "mona":
-                return _encode_artifacts_mona(artifacts)
-            case "yuanmo":
-                return _encode_artifacts_yuanmo(artifacts)
-            case "none":
-                return artifacts
+        """
+        Lock (`lock` is 1) or unlock (`lock` is 0) scanned artifacts at their
+        `index` in the warehouse list, the list must be in the order of the
+        scan. A card is only toggled if it reads as the artifact: set, slot,
+        star, level, main and sub attributes. A card reading as another
+        artifact means the order changed since the scan, the run stops with
+        `CB_ERR_LOCK_MISMATCH`. Cards already in the target state are skipped.
+        """
+        if lock not in (0, 1):
+            callback(code=ArtifactWarehouseHandler.CB_ERR_PARAM_INVALID)
+            return
+
+        attached = self._attach_warehouse(callback)
+        if attached is None:
+            return
+        hwnd, sch, img, count = attached
+
+        winx, winy, _, _ = wm.get_client_frame(hwnd)
+        card_clicks = self._layout.card_clicks(winx, winy)
+        last_top_row = max(
+            (count + self._list_col - 1) // self._list_col - self._list_row, 0
+        )
+        pages = plan_lock_pages(
+            [artifact.index for artifact in artifacts],
+            count,
+            self._list_row,
+            self._list_col,
+        )
+        total = sum(len(page.cards) for page in pages)
+        if total < len(artifacts):
+            # indexes past the end of the list, it shrank since the scan
+            callback(
+                code=ArtifactWarehouseHandler.CB_WARN_LOCK_UNPLACED,
+                count=len(artifacts) - total,
+            )
+
+        # a toggle is checked by comparing the lock icon before and after
+        lock_l, lock_t, lock_r, lock_b = self._info_bounds[5]
+        lock_x = int(lock_l + lock_r) // 2 + winx
+        lock_y = int(lock_t + lock_b) // 2 + winy
+
+        list_x, list_y = card_clicks[0][0]
+        pyautogui.moveTo(list_x, list_y)
+        for _ in range(3):
+            pyautogui.scroll(clicks=1)
+        scroll_anchor_img = self._crop_scroll_anchor(sch.take())
+
+        top_row = 0
+        ticks_per_row = 0.0
+        done = 0
+        for page in pages:
+            rows = page.top_row - top_row
+            if rows > 0:
+                pyautogui.moveTo(list_x, list_y)
+                scrolled, ticks, is_end, mouse_moved = self._scroll_list(
+                    sch, rows, scroll_anchor_img, ticks_per_row
+                )
+                if mouse_moved:
+                    callback(code=ArtifactWarehouseHandler.CB_ERR_INTERRUPT_BY_USER)
+                    return
+                if ticks_per_row <= 0 and scrolled > 0:
+                    ticks_per_row = ticks / scrolled
+
+                if is_end:
+                    # the list stops past the last row, the grid is aligned
+                    # again one row up at the last full page
+                    self._scroll_list(sch, -1, scroll_anchor_img, ticks_per_row)
+                    top_row = last_top_row
+                else:
+                    top_row += scrolled
+
+            for rowi, coli, target in page.cards:
+                artifact = artifacts[target]
+                rowi += page.top_row - top_row
+                done += 1
+                callback(
+                    code=ArtifactWarehouseHandler.CB_INFO_PROGRAM,
+                    program=done * 100 // total,
+                )
+                if rowi < 0 or rowi >= self._list_row:
+                    callback(
+                        code=ArtifactWarehouseHandler.CB_WARN_LOCK_FAILED,
+                        artifact=artifact,
+                    )
+                    continue
+
+                x, y = card_clicks[rowi][coli]
+                with perf.stage("lock.click"):
+                    pyautogui.click(x, y, _pause=False)
+                with perf.stage("lock.sleep"):
+                    time.sleep(0.1)
+                img = sch.take()
+                info, _ = self._fetch_artifact_info(img)
+                state = info["lock"]
+                if info["name"] == "" or info["level"] < 0 or state < 0:
+                    # unreadable, left as it is
+                    callback(
+                        code=ArtifactWarehouseHandler.CB_WARN_LOCK_FAILED,
+                        artifact=artifact,
+                    )
+                    continue
+                if (
+                    info["name"].strip() != artifact.name
+                    or info["pos"] != artifact.pos
+                    or info["star"] != artifact.star
+                    or info["level"] != artifact.level
+                    or info["main_attr"] != artifact.main_attr
+                    or info["sub_attrs"] != artifact.sub_attrs
+                ):
+                    # the indexes are stale, no other card can be trusted
+                    callback(
+                        code=ArtifactWarehouseHandler.CB_ERR_LOCK_MISMATCH,
+                        artifact=artifact,
+                    )
+                    return
+
+                mouse_x, mouse_y = x, y
+                if state != lock:
+                    lock_img = img[lock_t:lock_b, lock_l:lock_r, :]
+                    with perf.stage("lock.click"):
+                        pyautogui.click(lock_x, lock_y, _pause=False)
+                    with perf.stage("lock.sleep"):
+                        time.sleep(0.1)
+                    img = sch.take()
+                    confidence = cv2.matchTemplate(
+                        img[lock_t:lock_b, lock_l:lock_r, :],
+                        lock_img,
+                        cv2.TM_CCOEFF_NORMED,
+                    )[0, 0]
+                    if confidence > 0.95:
+                        callback(
+                            code=ArtifactWarehouseHandler.CB_WARN_LOCK_FAILED,
+                            artifact=artifact,
+                        )
+                    mouse_x, mouse_y = lock_x, lock_y
+
+                cur_mouse_x, cur_mouse_y = pyautogui.position()
+                if abs(cur_mouse_y - mouse_y) > 10 or abs(cur_mouse_x - mouse_x) > 10:
+                    callback(code=ArtifactWarehouseHandler.CB_ERR_INTERRUPT_BY_USER)
+                    return
+
+        callback(code=ArtifactWarehouseHandler.CB_INFO_FINISH)
+
+    def _crop_scroll_anchor(self, img):
+        """
+        The gap above the first card row, a card row passed it whenever it
+        looks the same again while scrolling.
+        """
+        l = self._list_bound[0]
+        t = self._list_bound[1] - self._card_intervaly
+        r = int(l + self._card_width * 0.3)
+        b = int(t + self._card_intervaly * 0.5)
+        return img[t:b, l:r, :]
+
+    def _scroll_list(self, sch, rows: int, scroll_anchor_img, ticks_per_row: float):
+        """
+        Scroll the list by `rows` card rows, down if positive, rows are
+        counted with the scroll anchor like `scan_artifacts` does. With a
+        known `ticks_per_row` all rows but the last are scrolled blind.
+
+        Return (scrolled rows, wheel ticks of the counted rows, if the end
+        of the list was hit, if the user moved the mouse).
+        """
+        direction = -1 if rows > 0 else 1
+        remaining = abs(rows)
+        scrolled = 0
+        if remaining > 1 and ticks_per_row > 0:
+            for _ in range(int(ticks_per_row * (remaining - 0.5))):
+                pyautogui.scroll(direction, _pause=False)
+                time.sleep(0.01)
+            scrolled = remaining - 1
+            remaining = 1
+
+        ticks = 0
+        is_interval = True
+        before_img = None
+        while True:
+            mouse_x, mouse_y = pyautogui.position()
+
+            img = sch.take()
+            if before_img is not None:
+                confidence = cv2.matchTemplate(
+                    img,
+                    before_img,
+                    cv2.TM_CCOEFF_NORMED,
+                )[0, 0]
+                if confidence > 0.95:
+                    return scrolled, ticks, True, False
+
+            before_img = img
+            confidence = cv2.matchTemplate(
+                self._crop_scroll_anchor(img),
+                scroll_anchor_img,
+                cv2.TM_CCOEFF_NORMED,
+            )[0, 0]
+            if confidence > 0.8:
+                if not is_interval:
+                    remaining -= 1
+                    scrolled += 1
+                    is_interval = True
+            else:
+                is_interval = False
+
+            if remaining == 0:
+                return scrolled, ticks, False, False
+
+            cur_mouse_x, cur_mouse_y = pyautogui.position()
+            if abs(cur_mouse_x - mouse_x) > 10 or abs(cur_mouse_y - mouse_y) > 10:
+                return scrolled, ticks, False, True
+            pyautogui.scroll(direction, _pause=False)
+            time.sleep(0.05)
+            ticks += 1
+
+    def _match(self, txt: str, matcher: AhoCorasickMatcher, fuzzy: FuzzyMatcher):
+        key = matcher.find(txt)[0]
+        if not key:
+            key = fuzzy.find(txt)[0]
+        return key
 
     def _fetch_artifact_info(self, img):
-        info_list = self._infer.predict(img, self._info_bounds)
-        pos = self._find_in_map(info_list[0], self._map_pos_zh)
+        with perf.stage("awh.fetch_artifact_info"):
+            info_list = self._infer.predict(
+                img, self._info_bounds, self._layout.info_field_types
+            )
+            with perf.stage("awh.parse"):
+                return self._parse_artifact_info(info_list)
+
+    def _parse_artifact_info(self, info_list: list[str]):
+        pos = self._match(info_list[0], self._pos_matcher, self._pos_fuzzy_matcher)
         level = self._to_int(info_list[1])
         if level < 0 or level > 20:
             level = -1
-        main_attr = self._find_in_map(info_list[2], self._map_attr_zh)
-        main_value = self._to_float(info_list[3])
-        if main_value < 1.0:
-            if main_attr == "hp":
-                main_attr = "hprate"
-            elif main_attr == "atk":
-                main_attr = "atkrate"
-            elif main_attr == "def":
-                main_attr = "defrate"
+        main_attr = self._match(
+            info_list[2], self._attr_matcher, self._attr_fuzzy_matcher
+        )
+        main_attr, main_value, _ = parse_stat(main_attr, info_list[3])
         star = self._to_star(info_list[4])
 
-        if info_list[5].find("开的锁") >= 0:
-            lock = 0
-        elif info_list[5].find("关的锁") >= 0:
-            lock = 1
-        else:
-            lock = -1
+        if main_value > 0.0 and star > 0 and level >= 0:
+            main_value, valid = rolltable.snap_main_value(
+                main_attr, star, level, main_value
+            )
+            if not valid:
+                main_value = -1.0
+
+        lock = self._to_lock(info_list[5])
 
-        equipper_match = re.search(r"(.*)已装备", info_list[6])
+        equipper_match = _equipper_pattern.search(info_list[6])
         if equipper_match:
             equipper = equipper_match.group(1)
         else:
@@ -740,25 +774,33 @@ class ArtifactWarehouseHandler(object):
         for i in range(7, len(info_list)):
             txt = info_list[i]
             if not name:
-                name = self._find_in_map(txt, self._map_name_zh)
+                name = self._name_matcher.find(txt)[0]
                 # ignore info below name
                 if name:
                     break
 
-            sub_attr = self._find_in_map(txt, self._map_attr_zh)
-            if sub_attr:
-                sub_value = self._to_float(txt)
-                if sub_value > 0.0:
-                    if sub_value < 1.0:
-                        if sub_attr == "hp":
-                            sub_attr = "hprate"
-                        elif sub_attr == "atk":
-                            sub_attr = "atkrate"
-                        elif sub_attr == "def":
-                            sub_attr = "defrate"
-
-                    sub_attrs.append(sub_attr)
-                    sub_values.append(sub_value)
+            sub_attr, sub_value, _ = self._statline.tokenize(txt)
+            if not sub_attr:
+                # neither a set name nor an attribute, rows without a value
+                # may be a set name with OCR errors
+                if sub_value <= 0.0:
+                    name = self._name_fuzzy_matcher.find(txt)[0]
+                    if name:
+                        break
+                continue
+
+            if sub_value > 0.0:
+                if star > 0:
+                    sub_value, valid = rolltable.snap_sub_value(
+                        sub_attr, star, level, sub_value
+                    )
+                    if not valid:
+                        # flag the value, the artifact is reported as
+                        # recognize failed
+                        sub_value = -1.0
+
+                sub_attrs.append(sub_attr)
+                sub_values.append(sub_value)
 
         artifact = {
             "name": name,
@@ -0,0 +1,198 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+from base import yamlio
+
+
+class DetLayout(object):
+    """
+    Detection bounds of a det config scaled to one window resolution,
+    everything is precomputed as integers in client coordinates.
+    """
+
+    def __init__(self, det_config: dict, win_width: int, win_height: int) -> None:
+        self.win_width = win_width
+        self.win_height = win_height
+
+        det_width = det_config["resolution"]["width"]
+        scale = win_width / det_width
+        self.scale = scale
+
+        count_bound = np.array(det_config["count"], dtype=np.float64)
+        count_bound *= scale
+        count_bound = np.round(count_bound).astype(np.int32)
+        self.count_bound = np.expand_dims(count_bound, axis=0)
+
+        info_bounds = []
+        info_bounds.append(np.array(det_config["pos"], dtype=np.float64))  # 0
+        info_bounds.append(np.array(det_config["level"], dtype=np.float64))  # 1
+        info_bounds.append(np.array(det_config["main_attr"], dtype=np.float64))  # 2
+        info_bounds.append(np.array(det_config["main_value"], dtype=np.float64))  # 3
+        info_bounds.append(np.array(det_config["star"], dtype=np.float64))  # 4
+        info_bounds.append(np.array(det_config["lock"], dtype=np.float64))  # 5
+        info_bounds.append(np.array(det_config["equipper"], dtype=np.float64))  # 6
+        txt_row = det_config["txt"]["row"]
+        txt_height = det_config["txt"]["txt_height"]
+        txt_bound = det_config["txt"]["bound"]
+        txt_intervalh = (txt_bound[3] - txt_bound[1] - txt_height * txt_row) / (
+            txt_row - 1
+        )
+        for i in range(txt_row):
+            l = txt_bound[0]
+            t = txt_bound[1] + i * (txt_height + txt_intervalh)
+            r = txt_bound[2]
+            b = t + txt_height
+            info_bounds.append(
+                np.array(
+                    (l, t, r, b),
+                    dtype=np.float64,
+                )
+            )
+        info_bounds = np.array(info_bounds, dtype=np.float64)
+        info_bounds *= scale
+        self.info_bounds = np.round(info_bounds).astype(np.int32)
+
+        # field type of every bound, see `TextRecInfer.Field_Charsets`
+        field_type = det_config.get("field_type", None) or {}
+        self.count_field_types = (field_type.get("count", "text"),)
+        self.info_field_types = tuple(
+            field_type.get(name, "text")
+            for name in (
+                "pos",
+                "level",
+                "main_attr",
+                "main_value",
+                "star",
+                "lock",
+                "equipper",
+            )
+        ) + (field_type.get("txt", "text"),) * txt_row
+
+        list_row = det_config["list"]["row"]
+        list_col = det_config["list"]["col"]
+        list_bound = np.array(det_config["list"]["bound"], dtype="float")
+        list_bound *= scale
+        list_bound = np.round(list_bound).astype(np.int32)
+        list_width = list_bound[2] - list_bound[0]
+        list_height = list_bound[3] - list_bound[1]
+        card_width = det_config["list"]["card"]["width"]
+        card_width *= scale
+        card_width = int(round(card_width))
+        card_height = det_config["list"]["card"]["height"]
+        card_height *= scale
+        card_height = int(round(card_height))
+        card_intervalx = int((list_width - card_width * list_col) / (list_col - 1))
+        card_intervaly = int((list_height - card_height * list_row) / (list_row - 1))
+        self.list_row = list_row
+        self.list_col = list_col
+        self.list_bound = list_bound
+        self.list_width = list_width
+        self.list_height = list_height
+        self.card_width = card_width
+        self.card_height = card_height
+        self.card_intervalx = card_intervalx
+        self.card_intervaly = card_intervaly
+
+        # center of every card of the grid, shape (row, col, 2)
+        cols = np.arange(list_col, dtype=np.int32)
+        rows = np.arange(list_row, dtype=np.int32)
+        card_centers = np.empty((list_row, list_col, 2), dtype=np.int32)
+        card_centers[:, :, 0] = (
+            list_bound[0] + cols * (card_intervalx + card_width) + card_width // 2
+        )[np.newaxis, :]
+        card_centers[:, :, 1] = (
+            list_bound[1] + rows * (card_intervaly + card_height) + card_height // 2
+        )[:, np.newaxis]
+        self.card_centers = card_centers
+
+    def card_clicks(self, winx: int, winy: int) -> list[list[tuple[int, int]]]:
+        """
+        Screen coordinates of every card center, indexed by [row][col].
+        """
+        return [
+            [(int(x) + winx, int(y) + winy) for x, y in row]
+            for row in self.card_centers
+        ]
+
+
+class DetLayoutIndex(object):
+    """
+    Parsed det configs of one folder, a config file is only parsed again
+    after its mtime changed.
+    """
+
+    def __init__(self, det_dir: str) -> None:
+        self._det_dir = det_dir
+        self._mtimes: dict[str, float] = {}
+        self._configs: dict[str, dict] = {}
+        self._layouts: dict[tuple[int, int], Optional[DetLayout]] = {}
+
+    def _refresh(self):
+        mtimes = {}
+        with os.scandir(self._det_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    mtimes[entry.name] = entry.stat().st_mtime
+
+        if mtimes == self._mtimes:
+            return
+
+        configs = {}
+        for det_name in sorted(mtimes):
+            if (
+                det_name in self._configs
+                and self._mtimes.get(det_name, None) == mtimes[det_name]
+            ):
+                configs[det_name] = self._configs[det_name]
+                continue
+
+            det_path = os.path.join(self._det_dir, det_name)
+            with open(det_path, "r", encoding="utf8") as f:
+                configs[det_name] = yamlio.safe_load(f)
+
+        self._mtimes = mtimes
+        self._configs = configs
+        self._layouts.clear()
+
+    def _find_config(self, win_width: int, win_height: int) -> Optional[dict]:
+        for det_config in self._configs.values():
+            det_width = det_config["resolution"]["width"]
+            det_height = det_config["resolution"]["height"]
+            if det_width == win_width and det_height == win_height:
+                return det_config
+
+        sch_ratio = win_width / win_height
+        for det_config in self._configs.values():
+            det_width = det_config["resolution"]["width"]
+            det_height = det_config["resolution"]["height"]
+            det_ratio = det_width / det_height
+            if abs((det_ratio - sch_ratio) / sch_ratio) < 0.01:
+                return det_config
+
+        return None
+
+    def lookup(self, win_width: int, win_height: int) -> Optional[DetLayout]:
+        self._refresh()
+
+        key = (win_width, win_height)
+        if key not in self._layouts:
+            det_config = self._find_config(win_width, win_height)
+            if det_config is None:
+                self._layouts[key] = None
+            else:
+                self._layouts[key] = DetLayout(det_config, win_width, win_height)
+
+        return self._layouts[key]
+
+
+_layout_indexes: dict[str, DetLayoutIndex] = {}
+
+
+def get_layout_index(det_dir: str) -> DetLayoutIndex:
+    index = _layout_indexes.get(det_dir, None)
+    if index is None:
+        index = DetLayoutIndex(det_dir)
+        _layout_indexes[det_dir] = index
+    return index
@@ -0,0 +1,291 @@
+import abc
+import json
+import tempfile
+from typing import Callable, Iterable, TextIO
+
+from base.artifact import ArtifactRecord, Attributes_Id, Percent_Attributes
+from base.mapper import MapperRegistry
+
+
+def _dumps(o) -> str:
+    return json.dumps(o, ensure_ascii=False)
+
+
+class ArtifactEncoder(abc.ABC):
+    """
+    Encodes artifacts into an export format, artifacts are written to the
+    stream as they are added so an inventory is never held in memory.
+    An encoder writes one stream at a time: `begin`, `add` every artifact,
+    then `end`.
+
+    Values of the mapper files `artifact_{name,pos,attr}_{format}.yaml`
+    are available as id indexed tuples.
+    """
+
+    format: str = ""
+
+    def __init__(self, registry: MapperRegistry) -> None:
+        self._names = registry.compiled(f"artifact_name_{self.format}.yaml").by_id
+        self._positions = registry.compiled(f"artifact_pos_{self.format}.yaml").by_id
+        self._attrs = registry.compiled(f"artifact_attr_{self.format}.yaml").by_id
+        self._f: TextIO | None = None
+        self._count = 0
+
+    def _accept(self, artifact: ArtifactRecord) -> bool:
+        return (
+            self._names[artifact.set_id] is not None
+            and self._positions[artifact.pos_id] is not None
+            and self._attrs[artifact.main_attr_id] is not None
+            and artifact.main_value != 0
+            and artifact.star >= 4
+            and 0 <= artifact.level <= 20
+        )
+
+    def begin(self, f: TextIO):
+        self._f = f
+        self._count = 0
+
+    @abc.abstractmethod
+    def add(self, artifact: ArtifactRecord):
+        pass
+
+    def end(self) -> int:
+        """
+        Finish the stream, return how many artifacts were written.
+        """
+        self._f = None
+        return self._count
+
+    def encode(self, artifacts: Iterable[ArtifactRecord], f: TextIO) -> int:
+        """
+        Write `artifacts` to `f`, return how many were written.
+        """
+        self.begin(f)
+        for artifact in artifacts:
+            self.add(artifact)
+        return self.end()
+
+
+_encoders: dict[str, type[ArtifactEncoder]] = {}
+
+
+def register_encoder(format: str) -> Callable:
+    def wrapper(cls: type[ArtifactEncoder]):
+        cls.format = format
+        _encoders[format] = cls
+        return cls
+
+    return wrapper
+
+
+def available_encoders() -> list[str]:
+    return list(_encoders.keys())
+
+
+def get_encoder(format: str, registry: MapperRegistry) -> ArtifactEncoder:
+    encoder_cls = _encoders.get(format, None)
+    if encoder_cls is None:
+        raise ValueError(f"unknown export format {format}")
+    return encoder_cls(registry)
+
+
+def encode_all(
+    artifacts: Iterable[ArtifactRecord],
+    outputs: list[tuple[ArtifactEncoder, TextIO]],
+) -> list[int]:
+    """
+    Encode `artifacts` with several encoders in one pass over them,
+    return how many artifacts each encoder wrote.
+    """
+    for encoder, f in outputs:
+        encoder.begin(f)
+    adds = [encoder.add for encoder, _ in outputs]
+    for artifact in artifacts:
+        for add in adds:
+            add(artifact)
+    return [encoder.end() for encoder, _ in outputs]
+
+
+class _ListEncoder(ArtifactEncoder):
+    """
+    Encoders writing a JSON list of one object per artifact.
+    """
+
+    # indent of the list
+    _indent = 0
+
+    @abc.abstractmethod
+    def _encode(self, artifact: ArtifactRecord) -> dict:
+        pass
+
+    def _begin_list(self):
+        self._f.write("[")
+
+    def _end_list(self):
+        if self._count:
+            self._f.write("\n" + " " * self._indent + "]")
+        else:
+            self._f.write("]")
+
+    def begin(self, f: TextIO):
+        super().begin(f)
+        self._item_sep = "\n" + " " * (self._indent + 2)
+        self._begin_list()
+
+    def add(self, artifact: ArtifactRecord):
+        if not self._accept(artifact):
+            return
+        self._f.write(self._item_sep if self._count == 0 else "," + self._item_sep)
+        self._f.write(_dumps(self._encode(artifact)))
+        self._count += 1
+
+    def end(self) -> int:
+        self._end_list()
+        return super().end()
+
+
+@register_encoder("none")
+class RawEncoder(_ListEncoder):
+    """
+    Artifacts as they are scanned, one dict per artifact.
+    """
+
+    def __init__(self, registry: MapperRegistry) -> None:
+        self._f = None
+        self._count = 0
+
+    def _accept(self, artifact: ArtifactRecord) -> bool:
+        return True
+
+    def _encode(self, artifact: ArtifactRecord) -> dict:
+        return artifact.to_dict()
+
+
+@register_encoder("mona")
+class MonaEncoder(ArtifactEncoder):
+    # artifacts are grouped by position, each group is spooled to a
+    # temporary file until all artifacts are added
+    _spool_size = 1 << 20
+
+    def begin(self, f: TextIO):
+        super().begin(f)
+        self._groups = {
+            pos: tempfile.SpooledTemporaryFile(
+                self._spool_size, mode="w+", encoding="utf8"
+            )
+            for pos in self._positions[:-1]
+        }
+        self._group_counts = {pos: 0 for pos in self._groups}
+
+    def add(self, artifact: ArtifactRecord):
+        if not self._accept(artifact):
+            return
+
+        pos = self._positions[artifact.pos_id]
+        new_artifact = {
+            "setName": self._names[artifact.set_id],
+            "position": pos,
+            "mainTag": {
+                "name": self._attrs[artifact.main_attr_id],
+                "value": artifact.main_value,
+            },
+            "normalTags": [
+                {"name": self._attrs[sub_attr], "value": sub_value}
+                for sub_attr, sub_value in zip(
+                    artifact.sub_attr_ids, artifact.sub_values
+                )
+            ],
+            "omit": False,
+            "level": artifact.level,
+            "star": artifact.star,
+            "equip": artifact.equipper,
+        }
+        group = self._groups[pos]
+        group.write("\n    " if self._group_counts[pos] == 0 else ",\n    ")
+        group.write(_dumps(new_artifact))
+        self._group_counts[pos] += 1
+        self._count += 1
+
+    def end(self) -> int:
+        f = self._f
+        try:
+            f.write('{\n  "version": 1')
+            for pos, group in self._groups.items():
+                f.write(f',\n  "{pos}": [')
+                group.seek(0)
+                while True:
+                    chunk = group.read(1 << 16)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                f.write("\n  ]" if self._group_counts[pos] else "]")
+            f.write("\n}")
+        finally:
+            for group in self._groups.values():
+                group.close()
+            self._groups = {}
+
+        return super().end()
+
+
+@register_encoder("yuanmo")
+class YuanMoEncoder(_ListEncoder):
+    def _encode(self, artifact: ArtifactRecord) -> dict:
+        sub_attrs = [self._attrs[sub_attr] for sub_attr in artifact.sub_attr_ids]
+        sub_values = artifact.sub_values
+
+        o = {
+            "asKey": self._names[artifact.set_id],
+            "rarity": artifact.star,
+            "slot": self._positions[artifact.pos_id],
+            "level": artifact.level,
+            "mainStat": self._attrs[artifact.main_attr_id],
+            "subStat1Type": "critRate",
+            "mark": "none",
+        }
+        for i in range(1, 5):
+            if i <= len(sub_attrs):
+                o[f"subStat{i}Type"] = sub_attrs[i - 1]
+                o[f"subStat{i}Value"] = sub_values[i - 1]
+            else:
+                o[f"subStat{i}Type"] = "critDamage"
+                o[f"subStat{i}Value"] = 0
+        return o
+
+
+@register_encoder("good")
+class GoodEncoder(_ListEncoder):
+    """
+    Genshin Open Object Description (GOOD) used by Genshin Optimizer,
+    percent values are written in percent. Equippers are not exported,
+    there is no mapper of character names yet.
+    """
+
+    _indent = 2
+    _percent = tuple(attr in Percent_Attributes for attr in Attributes_Id)
+
+    def _encode(self, artifact: ArtifactRecord) -> dict:
+        substats = []
+        for sub_attr, sub_value in zip(artifact.sub_attr_ids, artifact.sub_values):
+            if self._percent[sub_attr]:
+                sub_value = round(sub_value * 100, 1)
+            substats.append({"key": self._attrs[sub_attr], "value": sub_value})
+
+        return {
+            "setKey": self._names[artifact.set_id],
+            "slotKey": self._positions[artifact.pos_id],
+            "level": artifact.level,
+            "rarity": artifact.star,
+            "mainStatKey": self._attrs[artifact.main_attr_id],
+            "location": "",
+            "lock": artifact.lock == 1,
+            "substats": substats,
+        }
+
+    def _begin_list(self):
+        self._f.write('{\n  "format": "GOOD",\n  "version": 1,\n  "source": "gas",\n')
+        self._f.write('  "artifacts": [')
+
+    def _end_list(self):
+        super()._end_list()
+        self._f.write("\n}")
@@ -0,0 +1,44 @@
+class LockPage(object):
+    """
+    One scroll position of the warehouse list, `top_row` is the list row
+    shown in the first grid row, `cards` are the `(row, col, target)` grid
+    cells to toggle, `target` indexes the planned targets.
+    """
+
+    __slots__ = ("top_row", "cards")
+
+    def __init__(self, top_row: int) -> None:
+        self.top_row = top_row
+        self.cards: list[tuple[int, int, int]] = []
+
+
+def plan_lock_pages(
+    indexes: list[int], count: int, list_row: int, list_col: int
+) -> list[LockPage]:
+    """
+    Group the warehouse list `indexes` into pages visited top to bottom,
+    indexes outside a list of `count` artifacts are left out.
+
+    A page starts at the row of its first target so it covers as many
+    following targets as possible, the list only scrolls down and never
+    visits a page twice. Cards of a page are ordered row by row, every
+    other row right to left, to keep the cursor moves short.
+    """
+    total_rows = (count + list_col - 1) // list_col
+    last_top_row = max(total_rows - list_row, 0)
+
+    pages: list[LockPage] = []
+    page = None
+    for target, index in sorted(enumerate(indexes), key=lambda t: t[1]):
+        if index < 0 or index >= count:
+            continue
+
+        row = index // list_col
+        if page is None or row >= page.top_row + list_row:
+            page = LockPage(min(row, last_top_row))
+            pages.append(page)
+        page.cards.append((row - page.top_row, index % list_col, target))
+
+    for page in pages:
+        page.cards.sort(key=lambda c: (c[0], c[1] if c[0] % 2 == 0 else -c[1]))
+    return pages
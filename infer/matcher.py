@@ -0,0 +1,229 @@
+class AhoCorasickMatcher(object):
+    """
+    Multi-pattern matcher over the values of a mapper, e.g. `artifact_name_zh.yaml`.
+
+    `find` scans the text once and returns the key of the longest pattern
+    found in it (the leftmost one on ties) and where the pattern starts.
+    """
+
+    def __init__(self, mapper: dict[str, str]) -> None:
+        # trie, node 0 is the root
+        goto: list[dict[str, int]] = [{}]
+        depth = [0]
+        terminal: list[int] = [-1]
+
+        self._keys: list[str] = []
+        for key, pattern in mapper.items():
+            if not pattern:
+                continue
+
+            node = 0
+            for ch in pattern:
+                next_node = goto[node].get(ch, None)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto.append({})
+                    depth.append(depth[node] + 1)
+                    terminal.append(-1)
+                    goto[node][ch] = next_node
+                node = next_node
+
+            if terminal[node] < 0:
+                terminal[node] = len(self._keys)
+                self._keys.append(key)
+
+        # failure links in bfs order, `best` is the longest pattern
+        # ending at the node, following the failure links
+        fail = [0] * len(goto)
+        best = terminal.copy()
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+
+            if best[node] < 0:
+                best[node] = best[fail[node]]
+
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                child_fail = goto[f].get(ch, 0)
+                fail[child] = child_fail if child_fail != child else 0
+                queue.append(child)
+
+        # patterns lengths indexed by `best` value
+        self._lengths = [0] * len(self._keys)
+        for node, idx in enumerate(terminal):
+            if idx >= 0:
+                self._lengths[idx] = depth[node]
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+
+    def find(self, text: str) -> tuple[str, int]:
+        goto = self._goto
+        fail = self._fail
+        best = self._best
+        lengths = self._lengths
+
+        node = 0
+        found = -1
+        found_len = 0
+        found_end = 0
+        for i, ch in enumerate(text):
+            next_node = goto[node].get(ch, None)
+            while next_node is None and node:
+                node = fail[node]
+                next_node = goto[node].get(ch, None)
+            node = next_node if next_node is not None else 0
+
+            idx = best[node]
+            if idx >= 0 and lengths[idx] > found_len:
+                found = idx
+                found_len = lengths[idx]
+                found_end = i + 1
+
+        if found < 0:
+            return "", -1
+        return self._keys[found], found_end - found_len
+
+
+class FuzzyMatcher(object):
+    """
+    Error tolerant lookup of mapper values inside an OCR text row.
+
+    The distance is a weighted edit distance between a pattern and the best
+    matching substring of the text, substituting characters of the same
+    confusion group (characters the crnn model mixes up) is cheaper than
+    any other edit. `find` returns the key of the nearest pattern within
+    `max_distance`, or "" when there is none or the nearest is ambiguous.
+    """
+
+    def __init__(
+        self,
+        mapper: dict[str, str],
+        confusion_groups: list[str] | None = None,
+        max_distance: float = 1.0,
+        confusion_cost: float = 0.5,
+        min_pattern_len: int = 3,
+    ) -> None:
+        self._max_distance = max_distance
+        self._confusion_cost = confusion_cost
+
+        self._confusion_group: dict[str, int] = {}
+        for group_id, group in enumerate(confusion_groups or []):
+            for ch in group:
+                self._confusion_group[ch] = group_id
+
+        self._keys: list[str] = []
+        self._patterns: list[str] = []
+        for key, pattern in mapper.items():
+            if len(pattern) < min_pattern_len:
+                continue
+            self._keys.append(key)
+            self._patterns.append(pattern)
+        self._check_confusable()
+
+        # a pattern needs at least `_min_hits[i]` of its characters (or a
+        # confusable one) in the text to be within `max_distance`
+        min_cost = min(confusion_cost, 1.0) if confusion_groups else 1.0
+        max_edits = int(max_distance / min_cost)
+        self._min_hits = [
+            max(len(set(self._canonical(ch) for ch in p)) - max_edits, 1)
+            for p in self._patterns
+        ]
+        self._char_index: dict[str, list[int]] = {}
+        for idx, pattern in enumerate(self._patterns):
+            for ch in set(self._canonical(ch) for ch in pattern):
+                self._char_index.setdefault(ch, []).append(idx)
+
+    def _check_confusable(self):
+        # two patterns one confusion substitution apart would be matched
+        # onto each other at the cost of a likely OCR error
+        seen: dict[tuple, str] = {}
+        for pattern in self._patterns:
+            for i, ch in enumerate(pattern):
+                group_id = self._confusion_group.get(ch, None)
+                if group_id is None:
+                    continue
+                key = (pattern[:i], group_id, pattern[i + 1 :])
+                other = seen.setdefault(key, pattern)
+                assert (
+                    other == pattern
+                ), f"{other} and {pattern} only differ by confusable characters"
+
+    def _canonical(self, ch: str) -> str:
+        group_id = self._confusion_group.get(ch, None)
+        if group_id is None:
+            return ch
+        return f"\0{group_id}"
+
+    def _sub_cost(self, a: str, b: str) -> float:
+        if a == b:
+            return 0.0
+        group_a = self._confusion_group.get(a, None)
+        if group_a is not None and group_a == self._confusion_group.get(b, None):
+            return self._confusion_cost
+        return 1.0
+
+    def distance(self, pattern: str, text: str) -> tuple[float, int]:
+        """
+        Smallest weighted edit distance between `pattern` and any substring
+        of `text`, and the start of that substring.
+        """
+        n = len(text)
+        # free leading characters of the text
+        prev = [0.0] * (n + 1)
+        prev_start = list(range(n + 1))
+        for i, pch in enumerate(pattern, start=1):
+            cur = [float(i)] + [0.0] * n
+            cur_start = [0] * (n + 1)
+            for j in range(1, n + 1):
+                best = prev[j - 1] + self._sub_cost(pch, text[j - 1])
+                start = prev_start[j - 1]
+                if prev[j] + 1.0 < best:
+                    best = prev[j] + 1.0
+                    start = prev_start[j]
+                if cur[j - 1] + 1.0 < best:
+                    best = cur[j - 1] + 1.0
+                    start = cur_start[j - 1]
+                cur[j] = best
+                cur_start[j] = start
+            prev = cur
+            prev_start = cur_start
+
+        best_j = min(range(n + 1), key=lambda j: prev[j])
+        return prev[best_j], prev_start[best_j]
+
+    def find(self, text: str) -> tuple[str, int, float]:
+        hits: dict[int, int] = {}
+        for ch in set(self._canonical(ch) for ch in text):
+            for idx in self._char_index.get(ch, ()):
+                hits[idx] = hits.get(idx, 0) + 1
+
+        found = -1
+        found_start = -1
+        found_distance = self._max_distance
+        ambiguous = False
+        for idx, hit in hits.items():
+            if hit < self._min_hits[idx]:
+                continue
+
+            distance, start = self.distance(self._patterns[idx], text)
+            if distance > self._max_distance:
+                continue
+
+            if found < 0 or distance < found_distance:
+                found = idx
+                found_start = start
+                found_distance = distance
+                ambiguous = False
+            elif distance == found_distance:
+                ambiguous = True
+
+        if found < 0 or ambiguous:
+            return "", -1, -1.0
+        return self._keys[found], found_start, found_distance
@@ -1,10 +1,22 @@
+from typing import Optional
+
 import cv2
 import numpy as np
 import onnxruntime
 from PySide6.QtCore import QDir
 
+from tools import perf
+
 
 class TextRecInfer(object):
+    # characters a field can contain by field type, see `field_type` of the
+    # det config, fields without a charset are decoded over the whole dict
+    Field_Charsets: dict[str, Optional[str]] = {
+        "text": None,
+        "digit": "0123456789+",
+        "number": "0123456789+.,%/",
+    }
+
     # instance: "TextRecInfer" = None
 
     # def __new__(cls) -> Self:
@@ -26,12 +38,52 @@ class TextRecInfer(object):
 
         self.sess = onnxruntime.InferenceSession(model)
 
-    def predict(self, img: cv2.Mat, bounds: list | np.ndarray):
-        resize_imgs = self._preprocess(img, bounds)
-
-        (output,) = self.sess.run(None, {"input": resize_imgs})
-
-        return self._postprocess(output)[0]
+        self._field_masks: dict[tuple[str, ...], Optional[np.ndarray]] = {}
+
+    def _field_mask(self, field_types: tuple[str, ...]) -> Optional[np.ndarray]:
+        """
+        Mask of the characters allowed in each field, shape (fields, 1, dict),
+        the ctc blank and space are always allowed.
+        """
+        if field_types in self._field_masks:
+            return self._field_masks[field_types]
+
+        mask = None
+        if any(self.Field_Charsets.get(t, None) for t in field_types):
+            mask = np.ones((len(field_types), 1, len(self.dict)), dtype=np.bool_)
+            for i, field_type in enumerate(field_types):
+                charset = self.Field_Charsets.get(field_type, None)
+                if not charset:
+                    continue
+
+                mask[i, 0, :] = False
+                mask[i, 0, 0] = True
+                mask[i, 0, -1] = True
+                for idx, ch in enumerate(self.dict):
+                    if ch and ch in charset:
+                        mask[i, 0, idx] = True
+
+        self._field_masks[field_types] = mask
+        return mask
+
+    def predict(
+        self,
+        img: cv2.Mat,
+        bounds: list | np.ndarray,
+        field_types: Optional[list[str] | tuple[str, ...]] = None,
+    ):
+        with perf.stage("rec.predict"):
+            with perf.stage("rec.preprocess"):
+                resize_imgs = self._preprocess(img, bounds)
+
+            with perf.stage("rec.session_run"):
+                (output,) = self.sess.run(None, {"input": resize_imgs})
+
+            with perf.stage("rec.postprocess"):
+                mask = None
+                if field_types is not None:
+                    mask = self._field_mask(tuple(field_types))
+                return self._postprocess(output, mask=mask)[0]
 
     def _preprocess(self, img: cv2.Mat, bounds: list | np.ndarray):
         resize_h = 32
@@ -70,7 +122,16 @@ class TextRecInfer(object):
             resize_imgs.append(crop_img)
         return np.array(resize_imgs, dtype=np.float32)
 
-    def _postprocess(self, x: np.ndarray, cal_confidence=True):
+    def _postprocess(
+        self,
+        x: np.ndarray,
+        cal_confidence=True,
+        mask: Optional[np.ndarray] = None,
+    ):
+        if mask is not None:
+            # pick the best allowed character of each field
+            x = np.where(mask, x, -np.inf)
+
         # argmax_start_time = time.time()
         xidx = np.argmax(x, axis=2)
 
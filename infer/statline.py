@@ -0,0 +1,114 @@
+import re
+from typing import Optional
+
+from base.artifact import Percent_Attributes
+from infer.matcher import AhoCorasickMatcher, FuzzyMatcher
+
+# a number of at least 2 digits with optional thousands separators,
+# decimal point and percent sign, e.g. "4,780", "46.6%", "+19"
+_number_pattern = re.compile(r"\d[\d,，]*\.?\d+(%?)")
+_int_pattern = re.compile(r"\d[\d,，.]*")
+_separators = str.maketrans("", "", ",，")
+_int_separators = str.maketrans("", "", ",，.")
+
+# attribute shown with the same name for its flat and percent variant
+_percent_variant = {
+    "hp": "hprate",
+    "atk": "atkrate",
+    "def": "defrate",
+}
+
+
+def parse_number(text: str, pos: int = 0) -> tuple[float, bool]:
+    """
+    Return the first number in `text` after `pos` and whether it has a
+    percent sign, the value is -1.0 when there is no number.
+    """
+    m = _number_pattern.search(text, pos)
+    if m is None:
+        return -1.0, False
+
+    is_percent = bool(m.group(1))
+    num_str = m.group()
+    if is_percent:
+        num_str = num_str[:-1]
+    if "," in num_str or "，" in num_str:
+        num_str = num_str.translate(_separators)
+    return float(num_str), is_percent
+
+
+def parse_float(text: str) -> float:
+    value, is_percent = parse_number(text)
+    if is_percent:
+        return value / 100
+    return value
+
+
+def parse_int(text: str) -> int:
+    m = _int_pattern.search(text)
+    if m is None:
+        return -1
+
+    return int(m.group().translate(_int_separators))
+
+
+def resolve_attr(attr: str, value: float, is_percent: bool) -> tuple[str, bool]:
+    """
+    Pick the flat or percent variant of `attr` for its displayed value.
+    Flat values are integers, so a decimal value without the percent sign
+    is a percent value whose sign was not recognized.
+    """
+    if attr in Percent_Attributes:
+        return attr, True
+
+    variant = _percent_variant.get(attr, None)
+    if variant is None:
+        return attr, False
+
+    if is_percent or (value >= 0 and value != int(value)):
+        return variant, True
+    return attr, False
+
+
+def parse_stat(attr: str, text: str, pos: int = 0) -> tuple[str, float, bool]:
+    """
+    Parse the value of `attr` from `text` after `pos`, return the attribute
+    variant, the value (a fraction for percent values) and whether it is
+    a percent value.
+    """
+    value, is_percent = parse_number(text, pos)
+    return _to_stat(attr, value, is_percent)
+
+
+def _to_stat(attr: str, value: float, is_percent: bool) -> tuple[str, float, bool]:
+    attr, is_percent = resolve_attr(attr, value, is_percent)
+    if is_percent and value > 0.0:
+        value = value / 100
+    return attr, value, is_percent
+
+
+class StatLineTokenizer(object):
+    """
+    Split an OCR row of a stat, e.g. "·暴击率+3.9%",
+    into `(attr_id, value, is_percent)` in one pass over the row.
+    Percent values are returned as fractions.
+    """
+
+    def __init__(
+        self,
+        attr_matcher: AhoCorasickMatcher,
+        attr_fuzzy_matcher: Optional[FuzzyMatcher] = None,
+    ) -> None:
+        self._attr_matcher = attr_matcher
+        self._attr_fuzzy_matcher = attr_fuzzy_matcher
+
+    def tokenize(self, line: str) -> tuple[str, float, bool]:
+        attr, start = self._attr_matcher.find(line)
+        value, is_percent = parse_number(line, max(start, 0))
+
+        if not attr and value > 0.0 and self._attr_fuzzy_matcher is not None:
+            attr = self._attr_fuzzy_matcher.find(line)[0]
+
+        if not attr:
+            return "", value, is_percent
+        return _to_stat(attr, value, is_percent)
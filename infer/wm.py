@@ -9,6 +9,8 @@ import win32gui
 import win32print
 import win32ui
 
+from tools import perf
+
 
 def switch_to_genshin() -> int:
     # # Make program aware of DPI scaling
@@ -93,22 +95,24 @@ class ScreenshootHandler(object):
         self.bm.CreateCompatibleBitmap(self.dc, self.width, self.height)
 
     def take(self, path: Optional[str] = None):
-        bm_info = self.bm.GetInfo()
-        width = bm_info["bmWidth"]
-        height = bm_info["bmHeight"]
-
-        self.compatible_dc.SelectObject(self.bm)
-        self.compatible_dc.BitBlt(
-            (0, 0),
-            (width, height),
-            self.dc,
-            (0, 0),
-            win32con.SRCCOPY,
-        )
-
-        buffer = self.bm.GetBitmapBits(True)
-        img = np.frombuffer(buffer, dtype=np.uint8)
-        img.shape = (height, width, 4)
+        with perf.stage("screenshot.take"):
+            bm_info = self.bm.GetInfo()
+            width = bm_info["bmWidth"]
+            height = bm_info["bmHeight"]
+
+            self.compatible_dc.SelectObject(self.bm)
+            self.compatible_dc.BitBlt(
+                (0, 0),
+                (width, height),
+                self.dc,
+                (0, 0),
+                win32con.SRCCOPY,
+            )
+
+            buffer = self.bm.GetBitmapBits(True)
+            img = np.frombuffer(buffer, dtype=np.uint8)
+            img.shape = (height, width, 4)
+        perf.mark("screenshot.frame")
         # img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
 
         if path is not None:
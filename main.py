@@ -1,15 +1,38 @@
+import importlib
 import os
 import sys
+import threading
 
+from tools import startup
+
+# before the first heavy import so every import is timed
+if startup.requested(sys.argv):
+    startup.enable()
 
 from PySide6 import QtGui
-from PySide6.QtCore import QDir, Qt, QStandardPaths
+from PySide6.QtCore import QDir, Qt, QStandardPaths, QTimer
 from PySide6.QtWidgets import QApplication, QPushButton, QVBoxLayout, QWidget
 from typing_extensions import override
 
-from arrange.arrange_ui import ArrangeUi
-from export.export_ui import ExportUi
-from tools.stringresources import load_string
+from tools.stringresources import load_string, load_string_resource
+
+# The windows pull in the scanner (cv2, onnxruntime, pyautogui, win32), they
+# are imported once the launcher is shown, see `benchmark.bench_startup`.
+_window_modules = ("export.export_ui", "arrange.arrange_ui")
+
+
+def _preload_windows():
+    for name in _window_modules:
+        try:
+            with startup.stage(f"import {name}"):
+                importlib.import_module(name)
+        except Exception:
+            # reported again when the window is opened
+            pass
+
+    if startup.is_enabled():
+        startup.dump(QDir("data:").absoluteFilePath("startup.json"))
+        startup.disable()
 
 
 def init_resource():
@@ -68,6 +91,8 @@ class MainUi(QWidget):
             self.export_win.activateWindow()
             return
 
+        from export.export_ui import ExportUi
+
         self.export_win = ExportUi()
         self.export_win.show()
 
@@ -78,9 +103,16 @@ class MainUi(QWidget):
             self.arrage_win.activateWindow()
             return
 
+        from arrange.arrange_ui import ArrangeUi
+
         self.arrage_win = ArrangeUi()
         self.arrage_win.show()
 
+    @override
+    def paintEvent(self, event) -> None:
+        super().paintEvent(event)
+        startup.mark("first_paint")
+
     @override
     def closeEvent(self, event) -> None:
         self.app.quit()
@@ -88,12 +120,23 @@ class MainUi(QWidget):
 
 
 def run():
-    init_resource()
+    with startup.stage("init_resource"):
+        init_resource()
 
-    app = QApplication([])
+    with startup.stage("load_string_resource"):
+        load_string_resource()
 
-    main = MainUi(app)
-    main.show()
+    with startup.stage("QApplication"):
+        app = QApplication([])
+
+    with startup.stage("MainUi"):
+        main = MainUi(app)
+        main.show()
+
+    # a button clicked during the preload waits for the import to finish
+    QTimer.singleShot(
+        0, lambda: threading.Thread(target=_preload_windows, daemon=True).start()
+    )
 
     sys.exit(app.exec())
 
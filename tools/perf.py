@@ -0,0 +1,237 @@
+import json
+import os
+import time
+from typing import Optional
+
+from tools.tracer import TraceBuffer
+
+# Per-stage latency recorder for the scan pipeline.
+#
+# Recording is off by default, `stage()` then hands out a shared no-op context
+# manager so the instrumented code only pays for one global lookup. Set the
+# `GAS_PERF` environment variable (or call `enable()`) to collect samples,
+# and `GAS_TRACE` (or call `enable_trace()`) to also record every stage as a
+# span of a trace-event timeline.
+
+_samples: Optional[dict[str, list[int]]] = None
+_tracer: Optional[TraceBuffer] = None
+
+# upper bounds (ms) of the histogram buckets written into the summary
+_histogram_bounds_ms = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class _NullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _Stage(object):
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _emit(self._name, self._start, time.perf_counter_ns())
+        return False
+
+
+_null_stage = _NullStage()
+
+
+def env_enabled() -> bool:
+    return bool(os.environ.get("GAS_PERF", ""))
+
+
+def env_trace_enabled() -> bool:
+    return bool(os.environ.get("GAS_TRACE", ""))
+
+
+def enable():
+    global _samples
+    _samples = {}
+
+
+def disable():
+    global _samples
+    _samples = None
+
+
+def is_enabled() -> bool:
+    return _samples is not None
+
+
+def enable_trace(capacity: int = 1 << 16):
+    global _tracer
+    _tracer = TraceBuffer(capacity)
+
+
+def disable_trace():
+    global _tracer
+    _tracer = None
+
+
+def is_trace_enabled() -> bool:
+    return _tracer is not None
+
+
+def flush_trace(path: str):
+    if _tracer is not None:
+        _tracer.flush(path)
+
+
+def _stage_samples(name: str) -> list[int]:
+    assert _samples is not None
+    samples = _samples.get(name, None)
+    if samples is None:
+        samples = []
+        _samples[name] = samples
+    return samples
+
+
+def _emit(name: str, start_ns: int, end_ns: int):
+    if _samples is not None:
+        _stage_samples(name).append(end_ns - start_ns)
+    if _tracer is not None:
+        _tracer.complete(name, start_ns, end_ns)
+
+
+def stage(name: str):
+    if _samples is None and _tracer is None:
+        return _null_stage
+
+    return _Stage(name)
+
+
+def record(name: str, elapsed_ns: int):
+    if _samples is None and _tracer is None:
+        return
+
+    end_ns = time.perf_counter_ns()
+    _emit(name, end_ns - elapsed_ns, end_ns)
+
+
+def mark(name: str):
+    """
+    Instant event on the trace timeline, ignored by the stage statistics.
+    """
+    if _tracer is not None:
+        _tracer.instant(name)
+
+
+class StateTimer(object):
+    """
+    Time spent in each state of a state machine loop,
+    call `switch` at the top of every iteration and `stop` after the loop.
+    """
+
+    def __init__(self, prefix: str, state_names: dict[int, str]):
+        self._prefix = prefix
+        self._state_names = state_names
+        self._state = None
+        self._start = 0
+
+    def _record_state(self, now: int):
+        if self._state is None:
+            return
+
+        name = self._state_names.get(self._state, str(self._state))
+        _emit(f"{self._prefix}.{name}", self._start, now)
+
+    def switch(self, state: int):
+        now = time.perf_counter_ns()
+        self._record_state(now)
+        self._state = state
+        self._start = now
+
+    def stop(self):
+        self._record_state(time.perf_counter_ns())
+        self._state = None
+
+
+class _NullStateTimer(object):
+    def switch(self, state: int):
+        pass
+
+    def stop(self):
+        pass
+
+
+_null_state_timer = _NullStateTimer()
+
+
+def state_timer(prefix: str, state_names: dict[int, str]):
+    if _samples is None and _tracer is None:
+        return _null_state_timer
+
+    return StateTimer(prefix, state_names)
+
+
+def _percentile(sorted_samples: list[int], p: float) -> int:
+    # nearest-rank percentile
+    rank = int(round(p / 100 * len(sorted_samples) + 0.5)) - 1
+    rank = min(max(rank, 0), len(sorted_samples) - 1)
+    return sorted_samples[rank]
+
+
+def summary() -> dict:
+    if _samples is None:
+        return {}
+
+    stages = {}
+    for name, samples in _samples.items():
+        if not samples:
+            continue
+
+        ordered = sorted(samples)
+        total = sum(ordered)
+
+        histogram = [0] * (len(_histogram_bounds_ms) + 1)
+        bucket = 0
+        for sample in ordered:
+            while (
+                bucket < len(_histogram_bounds_ms)
+                and sample > _histogram_bounds_ms[bucket] * 1_000_000
+            ):
+                bucket += 1
+            histogram[bucket] += 1
+
+        stages[name] = {
+            "count": len(ordered),
+            "total_ms": total / 1e6,
+            "mean_ms": total / len(ordered) / 1e6,
+            "min_ms": ordered[0] / 1e6,
+            "p50_ms": _percentile(ordered, 50) / 1e6,
+            "p95_ms": _percentile(ordered, 95) / 1e6,
+            "p99_ms": _percentile(ordered, 99) / 1e6,
+            "max_ms": ordered[-1] / 1e6,
+            "histogram": {
+                "bounds_ms": list(_histogram_bounds_ms),
+                "counts": histogram,
+            },
+        }
+
+    return dict(
+        sorted(stages.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    )
+
+
+def dump(path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": 1, "stages": summary()},
+            f,
+            ensure_ascii=False,
+            indent=2,
+            separators=(",", ": "),
+        )
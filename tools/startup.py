@@ -0,0 +1,160 @@
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+# Wall time of the launcher start up, off by default.
+#
+# Set the `GAS_STARTUP` environment variable or pass `--profile-startup` to
+# `main.py` to record the start up stages, every import made while no other
+# import is running (nested imports count towards it) and the first paint.
+# Only depends on the standard library so it can be enabled before the
+# first heavy import.
+
+_flag = "--profile-startup"
+
+_start_ns: Optional[int] = None
+_stages: list[tuple[str, int, int]] = []
+_marks: dict[str, int] = {}
+_imports: dict[str, int] = {}
+
+_original_import = builtins.__import__
+_local = threading.local()
+
+
+class _NullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _Stage(object):
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _stages.append((self._name, self._start, time.perf_counter_ns()))
+        return False
+
+
+_null_stage = _NullStage()
+
+
+def _import_key(name: str, fromlist) -> Optional[str]:
+    """
+    Name an import by what it loads, None if everything is loaded.
+    """
+    module = sys.modules.get(name, None)
+    if module is None:
+        return name
+
+    # `from package import submodule` of a loaded package
+    missing = [item for item in fromlist or () if not hasattr(module, item)]
+    missing = [item for item in missing if item != "*"]
+    if missing:
+        return f"{name}.{','.join(missing)}"
+    return None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    key = None
+    if level == 0 and not getattr(_local, "depth", 0):
+        key = _import_key(name, fromlist)
+    if key is None:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _local.depth = 1
+    start = time.perf_counter_ns()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _imports[key] = _imports.get(key, 0) + time.perf_counter_ns() - start
+        _local.depth = 0
+
+
+def requested(argv: list[str]) -> bool:
+    return bool(os.environ.get("GAS_STARTUP", "")) or _flag in argv
+
+
+def enable():
+    global _start_ns
+    if _start_ns is not None:
+        return
+
+    _start_ns = time.perf_counter_ns()
+    builtins.__import__ = _timed_import
+
+
+def disable():
+    global _start_ns
+    if builtins.__import__ is _timed_import:
+        builtins.__import__ = _original_import
+    _start_ns = None
+
+
+def is_enabled() -> bool:
+    return _start_ns is not None
+
+
+def stage(name: str):
+    if _start_ns is None:
+        return _null_stage
+
+    return _Stage(name)
+
+
+def mark(name: str):
+    """
+    Time since `enable` of the first call with `name`.
+    """
+    if _start_ns is not None and name not in _marks:
+        _marks[name] = time.perf_counter_ns()
+
+
+def report() -> dict:
+    if _start_ns is None:
+        return {}
+
+    def ms(ns: int) -> float:
+        return ns / 1e6
+
+    stages = sorted(_stages, key=lambda s: s[2] - s[1], reverse=True)
+    imports = sorted(_imports.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "version": 1,
+        "marks_ms": {name: ms(ns - _start_ns) for name, ns in _marks.items()},
+        "stages": [
+            {
+                "name": name,
+                "start_ms": ms(start - _start_ns),
+                "elapsed_ms": ms(end - start),
+            }
+            for name, start, end in stages
+        ],
+        "imports": [{"name": name, "elapsed_ms": ms(ns)} for name, ns in imports],
+    }
+
+
+def dump(path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            report(),
+            f,
+            ensure_ascii=False,
+            indent=2,
+            separators=(",", ": "),
+        )
@@ -1,5 +1,5 @@
 from PySide6.QtCore import QDir
-import yaml
+from base import yamlio
 import os
 
 
@@ -20,7 +20,7 @@ def load_string_resource(country_code="zh"):
 
     with open(resource_path, "r", encoding="utf-8") as f:
         global _str_resources
-        _str_resources = yaml.safe_load(f)
+        _str_resources = yamlio.safe_load(f)
 
     # Add include files
     if _str_resources and _str_resources.get("include", None):
@@ -31,7 +31,7 @@ def load_string_resource(country_code="zh"):
             )
 
             with open(include_rel_path, "r", encoding="utf-8") as includef:
-                include_content: dict | None = yaml.safe_load(includef)
+                include_content: dict | None = yamlio.safe_load(includef)
 
             if include_content is None:
                 print(f"Warning: empty include file {include_path}")
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from array import array
+
+# Chrome trace-event recorder, load the output in chrome://tracing or
+# https://ui.perfetto.dev to see the timeline of a scan.
+#
+# Events are kept in preallocated columns and only turned into JSON when the
+# buffer is flushed, so recording a span is a few array stores.
+
+_instant_dur = -1
+
+
+class TraceBuffer(object):
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        self._capacity = capacity
+        self._names: list[str | None] = [None] * capacity
+        self._ts = array("q", bytes(8 * capacity))
+        self._dur = array("q", bytes(8 * capacity))
+        self._tid = array("q", bytes(8 * capacity))
+        self._size = 0
+        self._dropped = 0
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def _append(self, name: str, ts_ns: int, dur_ns: int):
+        with self._lock:
+            i = self._size
+            if i >= self._capacity:
+                self._dropped += 1
+                return
+            self._size = i + 1
+
+        self._names[i] = name
+        self._ts[i] = ts_ns - self._origin
+        self._dur[i] = dur_ns
+        self._tid[i] = threading.get_ident()
+
+    def complete(self, name: str, start_ns: int, end_ns: int):
+        self._append(name, start_ns, end_ns - start_ns)
+
+    def instant(self, name: str, ts_ns: int | None = None):
+        if ts_ns is None:
+            ts_ns = time.perf_counter_ns()
+        self._append(name, ts_ns, _instant_dur)
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._dropped = 0
+            self._origin = time.perf_counter_ns()
+
+    def flush(self, path: str):
+        """
+        Write the buffered events into `path` as trace-event JSON
+        and reset the buffer.
+        """
+        pid = os.getpid()
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+        with self._lock:
+            size = self._size
+            dropped = self._dropped
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"displayTimeUnit": "ms", "otherData": ')
+            json.dump({"dropped_events": dropped}, f)
+            f.write(', "traceEvents": [\n')
+
+            tids = set()
+            for i in range(size):
+                tid = self._tid[i]
+                tids.add(tid)
+                event = {
+                    "name": self._names[i],
+                    "cat": self._names[i].split(".", 1)[0],  # type: ignore
+                    "pid": pid,
+                    "tid": tid,
+                    "ts": self._ts[i] / 1000,
+                }
+                if self._dur[i] == _instant_dur:
+                    event["ph"] = "i"
+                    event["s"] = "t"
+                else:
+                    event["ph"] = "X"
+                    event["dur"] = self._dur[i] / 1000
+                json.dump(event, f, ensure_ascii=False)
+                f.write(",\n")
+
+            for tid in tids:
+                json.dump(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": thread_names.get(tid, str(tid))},
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+                f.write(",\n")
+
+            json.dump(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {"name": "GenshinArtifactScanner"},
+                },
+                f,
+            )
+            f.write("\n]}\n")
+
+        self.clear()
@@ -1,4 +1,4 @@
-__all__ = ["LogView", "Ranger", "FlowLayout"]
+__all__ = ["LogOp", "LogView", "Ranger", "FlowLayout"]
 
 from .log_view import *
 from .ranger import *
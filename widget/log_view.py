@@ -1,7 +1,14 @@
+from enum import Enum
+
 from PySide6.QtGui import QTextCursor
 from PySide6.QtWidgets import QBoxLayout, QWidget, QTextEdit, QSizePolicy
 
 
+class LogOp(Enum):
+    Append = 0
+    Clear = 1
+
+
 class LogView(QWidget):
     def __init__(self):
         super().__init__()